@@ -0,0 +1,201 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Benchmark for instantiating the fact groups (invariants) of a task.
+Compare fact_groups.instantiate_groups, which looks up the reachable facts
+that match a group in an index, with the naive expansion that tries every
+object of the task at the counted position of each group fact. Both must
+produce the same groups.
+"""
+
+import argparse
+import contextlib
+import io
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+
+
+DIR = Path(__file__).resolve().parent
+REPO = DIR.parents[1]
+BENCHMARKS_DIR = DIR / "benchmarks"
+sys.path.insert(0, str(REPO / "src" / "translate"))
+
+import fact_groups
+import instantiate
+import invariant_finder
+import normalize
+import pddl
+import pddl_parser
+
+
+LOGISTICS_DOMAIN = """\
+(define (domain logistics)
+  (:requirements :strips :typing)
+  (:types truck airplane - vehicle
+          package vehicle - physobj
+          airport location - place
+          city place physobj - object)
+  (:predicates (in-city ?loc - place ?city - city)
+               (at ?obj - physobj ?loc - place)
+               (in ?pkg - package ?veh - vehicle))
+  (:action load-truck
+    :parameters (?pkg - package ?truck - truck ?loc - place)
+    :precondition (and (at ?truck ?loc) (at ?pkg ?loc))
+    :effect (and (not (at ?pkg ?loc)) (in ?pkg ?truck)))
+  (:action load-airplane
+    :parameters (?pkg - package ?airplane - airplane ?loc - place)
+    :precondition (and (at ?pkg ?loc) (at ?airplane ?loc))
+    :effect (and (not (at ?pkg ?loc)) (in ?pkg ?airplane)))
+  (:action unload-truck
+    :parameters (?pkg - package ?truck - truck ?loc - place)
+    :precondition (and (at ?truck ?loc) (in ?pkg ?truck))
+    :effect (and (not (in ?pkg ?truck)) (at ?pkg ?loc)))
+  (:action unload-airplane
+    :parameters (?pkg - package ?airplane - airplane ?loc - place)
+    :precondition (and (in ?pkg ?airplane) (at ?airplane ?loc))
+    :effect (and (not (in ?pkg ?airplane)) (at ?pkg ?loc)))
+  (:action drive-truck
+    :parameters (?truck - truck ?loc-from - place ?loc-to - place
+                 ?city - city)
+    :precondition (and (at ?truck ?loc-from) (in-city ?loc-from ?city)
+                       (in-city ?loc-to ?city))
+    :effect (and (not (at ?truck ?loc-from)) (at ?truck ?loc-to)))
+  (:action fly-airplane
+    :parameters (?airplane - airplane ?loc-from - airport ?loc-to - airport)
+    :precondition (at ?airplane ?loc-from)
+    :effect (and (not (at ?airplane ?loc-from)) (at ?airplane ?loc-to))))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP)
+    parser.add_argument(
+        "tasks", nargs="*",
+        help="pairs of domain and problem files (default: all tasks in "
+        "misc/tests/benchmarks)")
+    parser.add_argument(
+        "--logistics", metavar="PACKAGES", type=int, action="append",
+        default=[],
+        help="also benchmark a generated logistics task with 20 cities of "
+        "10 locations and this many packages (can be repeated)")
+    parser.add_argument(
+        "--runs", type=int, default=3,
+        help="report the fastest of this many runs (default: %(default)d)")
+    return parser.parse_args()
+
+
+def write_logistics_task(directory, num_packages):
+    rng = random.Random(num_packages)
+    cities = [f"c{i}" for i in range(20)]
+    locations = [f"{city}-l{j}" for city in cities for j in range(10)]
+    airports = [f"{city}-ap" for city in cities]
+    trucks = [f"t-{city}" for city in cities]
+    airplanes = [f"a{i}" for i in range(10)]
+    packages = [f"p{i}" for i in range(num_packages)]
+    places = locations + airports
+    init = []
+    for city in cities:
+        for place in places:
+            if place.startswith(f"{city}-"):
+                init.append(f"(in-city {place} {city})")
+        init.append(f"(at t-{city} {city}-l0)")
+    init += [f"(at {airplane} {rng.choice(airports)})"
+             for airplane in airplanes]
+    init += [f"(at {package} {rng.choice(places)})" for package in packages]
+    goal = [f"(at {package} {rng.choice(places)})" for package in packages]
+    directory = directory / "logistics"
+    directory.mkdir(exist_ok=True)
+    domain = directory / "domain.pddl"
+    problem = directory / f"p{num_packages}.pddl"
+    domain.write_text(LOGISTICS_DOMAIN)
+    problem.write_text(
+        f"(define (problem logistics-{num_packages}) (:domain logistics)\n"
+        f"(:objects {' '.join(cities)} - city {' '.join(locations)} - location\n"
+        f"  {' '.join(airports)} - airport {' '.join(trucks)} - truck\n"
+        f"  {' '.join(airplanes)} - airplane {' '.join(packages)} - package)\n"
+        f"(:init {' '.join(init)})\n"
+        f"(:goal (and {' '.join(goal)})))\n")
+    return domain, problem
+
+
+def get_tasks(args, directory):
+    if args.tasks:
+        if len(args.tasks) % 2:
+            sys.exit("Error: expected pairs of domain and problem files")
+        tasks = [(Path(domain), Path(problem)) for domain, problem in
+                 zip(args.tasks[::2], args.tasks[1::2])]
+    elif args.logistics:
+        tasks = []
+    else:
+        tasks = []
+        for domain in sorted(BENCHMARKS_DIR.glob("*/domain.pddl")):
+            for problem in sorted(domain.parent.glob("*.pddl")):
+                if problem != domain:
+                    tasks.append((domain, problem))
+    for num_packages in args.logistics:
+        tasks.append(write_logistics_task(directory, num_packages))
+    return tasks
+
+
+def expand_group_naively(group, task, reachable_facts):
+    result = []
+    for fact in group:
+        try:
+            pos = list(fact.args).index("?X")
+        except ValueError:
+            if fact in reachable_facts:
+                result.append(fact)
+        else:
+            for obj in task.objects:
+                newargs = list(fact.args)
+                newargs[pos] = obj.name
+                atom = pddl.Atom(fact.predicate, newargs)
+                if atom in reachable_facts:
+                    result.append(atom)
+    return result
+
+
+def time_runs(function, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    args = parse_args()
+    print(f"{'task':<40} {'objects':>8} {'groups':>7} {'facts':>8} "
+          f"{'naive':>8} {'indexed':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for domain, problem in get_tasks(args, Path(directory)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                task = pddl_parser.open(
+                    domain_filename=str(domain), task_filename=str(problem))
+                normalize.normalize(task)
+                _, atoms, _, _, _, reachable_action_params = \
+                    instantiate.explore(task)
+                groups = invariant_finder.get_groups(
+                    task, reachable_action_params)
+            naive_groups, naive_time = time_runs(
+                lambda: [expand_group_naively(group, task, atoms)
+                         for group in groups], args.runs)
+            indexed_groups, indexed_time = time_runs(
+                lambda: fact_groups.instantiate_groups(groups, task, atoms),
+                args.runs)
+            pddl.conditions.clear_interned_literals()
+            if naive_groups != indexed_groups:
+                sys.exit(f"Error: groups differ for {problem}")
+            name = f"{domain.parent.name}/{problem.name}"
+            num_facts = sum(len(group) for group in indexed_groups)
+            print(f"{name:<40} {len(task.objects):>8} {len(groups):>7} "
+                  f"{num_facts:>8} {naive_time:>7.3f}s {indexed_time:>7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Microbenchmark for the translator's PDDL (Lisp) parser.
+Generate a large grounded problem file and compare parse_nested_list with the
+previous line-by-line tokenizer and recursive generator list builder. Both
+must produce the same nested list.
+"""
+
+import argparse
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+
+
+DIR = Path(__file__).resolve().parent
+REPO = DIR.parents[1]
+sys.path.insert(0, str(REPO / "src" / "translate"))
+
+from pddl_parser import lisp_parser
+from pddl_parser.parse_error import ParseError
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP)
+    parser.add_argument(
+        "--size", type=int, default=50,
+        help="size of the generated problem file in MB (default: %(default)d)")
+    parser.add_argument(
+        "--problem",
+        help="parse this PDDL file instead of generating one")
+    parser.add_argument(
+        "--runs", type=int, default=3,
+        help="report the fastest of this many runs (default: %(default)d)")
+    return parser.parse_args()
+
+
+def reference_parse_nested_list(input_file):
+    # The parser as it was before the whole-file tokenizer.
+    def tokenize(input):
+        for line in input:
+            line = line.split(";", 1)[0]
+            try:
+                line.encode("ascii")
+            except UnicodeEncodeError:
+                raise ParseError(f"Non-ASCII character outside comment: {line[0:-1]}")
+            line = line.replace("(", " ( ").replace(")", " ) ").replace("?", " ?")
+            for token in line.split():
+                yield token.lower()
+
+    def parse_list_aux(tokenstream):
+        while True:
+            try:
+                token = next(tokenstream)
+            except StopIteration:
+                raise ParseError("Missing ')'")
+            if token == ")":
+                return
+            elif token == "(":
+                yield list(parse_list_aux(tokenstream))
+            else:
+                yield token
+
+    tokens = tokenize(input_file)
+    next_token = next(tokens)
+    if next_token != "(":
+        raise ParseError(f"Expected '(', got '{next_token}'.")
+    result = list(parse_list_aux(tokens))
+    remaining_tokens = list(tokens)
+    if remaining_tokens:
+        raise ParseError(f"Tokens remaining after parsing: "
+                         f"{' '.join(remaining_tokens)}")
+    return result
+
+
+def write_grounded_problem(path, size_mb):
+    rng = random.Random(2024)
+    num_objects = 5000
+    objects = [f"obj{i}" for i in range(num_objects)]
+    with open(path, "w") as f:
+        f.write("; generated grounded problem\n")
+        f.write("(define (problem big) (:domain big)\n")
+        f.write("  (:objects\n")
+        for i in range(0, num_objects, 20):
+            f.write("    " + " ".join(objects[i:i + 20]) + " - thing\n")
+        f.write("  )\n  (:init\n")
+        while f.tell() < size_mb * 1024 * 1024:
+            pred = rng.choice(["at", "Connected", "fuel-level", "in"])
+            args = " ".join(rng.choice(objects) for _ in range(rng.randint(1, 3)))
+            comment = " ; static" if rng.random() < 0.05 else ""
+            f.write(f"    ({pred} {args}){comment}\n")
+        f.write("  )\n  (:goal (and (at obj1 obj2) (in obj3 obj4))))\n")
+
+
+def time_parse(parse, path, runs):
+    best = None
+    for _ in range(runs):
+        with open(path, encoding="ISO-8859-1") as f:
+            start = time.perf_counter()
+            result = parse(f)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.problem:
+            path = Path(args.problem)
+        else:
+            path = Path(tmp_dir) / "problem.pddl"
+            write_grounded_problem(path, args.size)
+        size_mb = path.stat().st_size / (1024 * 1024)
+        print(f"Parsing {path} ({size_mb:.1f} MB), best of {args.runs} runs")
+
+        reference_time, reference_result = time_parse(
+            reference_parse_nested_list, path, args.runs)
+        new_time, new_result = time_parse(
+            lisp_parser.parse_nested_list, path, args.runs)
+
+    if new_result != reference_result:
+        sys.exit("Error: parse results differ")
+    print(f"line-by-line tokenizer: {reference_time:.2f}s")
+    print(f"whole-file tokenizer:   {new_time:.2f}s "
+          f"({reference_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
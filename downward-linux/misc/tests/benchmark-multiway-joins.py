@@ -0,0 +1,103 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Benchmark for the translator's --multiway-joins option.
+Compute the relaxed reachable model of each benchmark task once with rules
+split into binary joins and once with multi-way joins, and compare the number
+of auxiliary atoms, total queue pushes and time. Both must reach the same
+relevant atoms.
+"""
+
+import argparse
+import contextlib
+import io
+from pathlib import Path
+import re
+import sys
+import time
+
+
+DIR = Path(__file__).resolve().parent
+REPO = DIR.parents[1]
+BENCHMARKS_DIR = DIR / "benchmarks"
+sys.path.insert(0, str(REPO / "src" / "translate"))
+
+import build_model
+import normalize
+import options
+import pddl_parser
+import pddl_to_prolog
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP)
+    parser.add_argument(
+        "tasks", nargs="*",
+        help="pairs of domain and problem files (default: all tasks in "
+        "misc/tests/benchmarks)")
+    parser.add_argument(
+        "--runs", type=int, default=3,
+        help="report the fastest of this many runs (default: %(default)d)")
+    return parser.parse_args()
+
+
+def get_tasks(args):
+    if args.tasks:
+        if len(args.tasks) % 2:
+            sys.exit("Error: expected pairs of domain and problem files")
+        return [(Path(domain), Path(problem)) for domain, problem in
+                zip(args.tasks[::2], args.tasks[1::2])]
+    tasks = []
+    for domain in sorted(BENCHMARKS_DIR.glob("*/domain.pddl")):
+        for problem in sorted(domain.parent.glob("*.pddl")):
+            if problem != domain:
+                tasks.append((domain, problem))
+    return tasks
+
+
+def compute_model(task, multiway_joins):
+    options.configure(multiway_joins=multiway_joins)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        prog = pddl_to_prolog.translate(task)
+        start = time.perf_counter()
+        model = build_model.compute_model(prog)
+        elapsed = time.perf_counter() - start
+    counts = {name: int(number) for number, name in re.findall(
+        r"^(\d+) (auxiliary atoms|total queue pushes)$",
+        output.getvalue(), re.M)}
+    relevant_atoms = {atom for atom in model
+                      if not (isinstance(atom.predicate, str) and
+                              "$" in atom.predicate)}
+    return (len(prog.rules), counts["auxiliary atoms"],
+            counts["total queue pushes"], elapsed, relevant_atoms)
+
+
+def main():
+    args = parse_args()
+    print(f"{'task':<32} {'joins':<8} {'rules':>6} {'auxiliary':>10} "
+          f"{'pushes':>10} {'time':>8}")
+    for domain, problem in get_tasks(args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            task = pddl_parser.open(
+                domain_filename=str(domain), task_filename=str(problem))
+            normalize.normalize(task)
+        name = f"{domain.parent.name}/{problem.name}"
+        relevant_atoms = []
+        for multiway_joins in [False, True]:
+            runs = [compute_model(task, multiway_joins)
+                    for _ in range(args.runs)]
+            num_rules, auxiliary, pushes, _, atoms = runs[0]
+            best_time = min(run[3] for run in runs)
+            relevant_atoms.append(atoms)
+            mode = "multiway" if multiway_joins else "binary"
+            print(f"{name:<32} {mode:<8} {num_rules:>6} {auxiliary:>10} "
+                  f"{pushes:>10} {best_time:>7.3f}s")
+        if relevant_atoms[0] != relevant_atoms[1]:
+            sys.exit(f"Error: relevant atoms differ for {name}")
+    options.configure()
+
+
+if __name__ == "__main__":
+    main()
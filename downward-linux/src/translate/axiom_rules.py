@@ -78,6 +78,11 @@ def compute_necessary_literals(dependencies, goals, operators):
         if g.positive() in dependencies.derived_variables:
             necessary_literals.add(g)
 
+    if not dependencies.derived_variables:
+        # Nothing to look for in the operators (which may be expensive to
+        # iterate over with --streaming-output).
+        return necessary_literals
+
     for op in operators:
         derived_preconditions = (l for l in op.precondition if l.positive()
                                  in dependencies.derived_variables)
@@ -2,8 +2,10 @@
 
 
 import sys
-import itertools
+from operator import itemgetter
+import time
 
+import options
 import pddl
 import timers
 from functools import reduce
@@ -11,6 +13,7 @@ from functools import reduce
 def convert_rules(prog):
     RULE_TYPES = {
         "join": JoinRule,
+        "multijoin": MultiJoinRule,
         "product": ProductRule,
         "project": ProjectRule,
         }
@@ -50,14 +53,64 @@ def variables_to_numbers(effect, conditions):
         new_conditions.append(pddl.Atom(cond.predicate, new_cond_args))
     return new_effect, new_conditions
 
+class Interner:
+    """Numbers the predicates and objects of the model consecutively.
+
+    The fixpoint computation represents a fact P(a1, ..., aN) as the int
+    tuple (P, a1, ..., aN) of these numbers, which is much cheaper to
+    hash and store than a pddl.Atom. Facts are converted back to atoms
+    once the model is complete."""
+    def __init__(self):
+        self.predicate_numbers = {}
+        self.predicates = []
+        self.object_numbers = {}
+        self.objects = []
+    def predicate(self, predicate):
+        number = self.predicate_numbers.get(predicate)
+        if number is None:
+            number = self.predicate_numbers[predicate] = len(self.predicates)
+            self.predicates.append(predicate)
+        return number
+    def object(self, obj):
+        number = self.object_numbers.get(obj)
+        if number is None:
+            number = self.object_numbers[obj] = len(self.objects)
+            self.objects.append(obj)
+        return number
+    def fact(self, atom):
+        return (self.predicate(atom.predicate),) + tuple(
+            self.object(arg) for arg in atom.args)
+    def atom(self, fact):
+        objects = self.objects
+        return pddl.Atom(self.predicates[fact[0]],
+                         [objects[number] for number in fact[1:]])
+
+def make_key_getter(positions):
+    """Return a function that reads the given positions of a fact: a
+    bare object for one position, a tuple otherwise."""
+    if positions:
+        return itemgetter(*positions)
+    return lambda fact: ()
+
 class BuildRule:
-    def prepare_effect(self, new_atom, cond_index):
-        effect_args = list(self.effect.args)
-        cond = self.conditions[cond_index]
-        for var_no, obj in zip(cond.args, new_atom.args):
-            if isinstance(var_no, int):
-                effect_args[var_no] = obj
-        return effect_args
+    def intern(self, interner):
+        # The effect with its constants interned; variables are filled in
+        # from the bindings of the conditions.
+        self.effect_template = [interner.predicate(self.effect.predicate)] + [
+            None if isinstance(arg, int) else interner.object(arg)
+            for arg in self.effect.args]
+        # For each condition, the (effect position, fact position) pairs
+        # of the variables it binds.
+        self.cond_bindings = [
+            [(var_no + 1, fact_pos)
+             for fact_pos, var_no in enumerate(cond.args, 1)
+             if isinstance(var_no, int)]
+            for cond in self.conditions]
+    def prepare_effect(self, new_fact, cond_index):
+        effect = list(self.effect_template)
+        for eff_pos, fact_pos in self.cond_bindings[cond_index]:
+            effect[eff_pos] = new_fact[fact_pos]
+        return effect
     def __str__(self):
         return "%s :- %s" % (self.effect, ", ".join(map(str, self.conditions)))
     def __repr__(self):
@@ -73,7 +126,7 @@ class JoinRule(BuildRule):
         right_vars = {var for var in right_args if isinstance(var, int)}
         common_vars = sorted(left_vars & right_vars)
         self.common_var_positions = [
-            [args.index(var) for var in common_vars]
+            [args.index(var) + 1 for var in common_vars]
             for args in (list(left_args), list(right_args))]
         self.atoms_by_key = ({}, {})
     def validate(self):
@@ -89,31 +142,126 @@ class JoinRule(BuildRule):
                     if isinstance(v, int) or v[0] == "?"}
         assert left_vars & right_vars, self
         assert (left_vars | right_vars) == (left_vars & right_vars) | eff_vars, self
-    def update_index(self, new_atom, cond_index):
-        ordered_common_args = [
-            new_atom.args[position]
-            for position in self.common_var_positions[cond_index]]
-        key = tuple(ordered_common_args)
-        self.atoms_by_key[cond_index].setdefault(key, []).append(new_atom)
-    def fire(self, new_atom, cond_index, enqueue_func):
-        effect_args = self.prepare_effect(new_atom, cond_index)
-        ordered_common_args = [
-            new_atom.args[position]
-            for position in self.common_var_positions[cond_index]]
-        key = tuple(ordered_common_args)
+    def intern(self, interner):
+        super().intern(interner)
+        # Keys are the common objects in the order of common_vars. Rules
+        # whose conditions only share projected variables have the empty key.
+        self.key_getters = [make_key_getter(positions)
+                            for positions in self.common_var_positions]
+    def update_index(self, new_fact, cond_index):
+        key = self.key_getters[cond_index](new_fact)
+        self.atoms_by_key[cond_index].setdefault(key, []).append(new_fact)
+    def fire(self, new_fact, cond_index, enqueue_func):
+        effect = self.prepare_effect(new_fact, cond_index)
+        key = self.key_getters[cond_index](new_fact)
         other_cond_index = 1 - cond_index
-        other_cond = self.conditions[other_cond_index]
-        for atom in self.atoms_by_key[other_cond_index].get(key, []):
-            for var_no, obj in zip(other_cond.args, atom.args):
-                if isinstance(var_no, int):
-                    effect_args[var_no] = obj
-            enqueue_func(self.effect.predicate, effect_args)
+        other_bindings = self.cond_bindings[other_cond_index]
+        for fact in self.atoms_by_key[other_cond_index].get(key, []):
+            for eff_pos, fact_pos in other_bindings:
+                effect[eff_pos] = fact[fact_pos]
+            enqueue_func(tuple(effect))
+
+class MultiJoinRule(BuildRule):
+    """Hash join of three or more connected conditions.
+
+    A new fact for one condition is joined with the facts seen so far for
+    the others, one condition at a time: each step looks up the facts of
+    the next condition by the values of its variables that are already
+    bound. Unlike the binary decomposition, this needs no auxiliary
+    predicates, and variables that do not occur in the effect are joined
+    on as well."""
+    def __init__(self, effect, conditions):
+        self.effect = effect
+        self.conditions = conditions
+    def validate(self):
+        assert len(self.conditions) >= 3, self
+        cond_vars = {v for cond in self.conditions for v in cond.args
+                     if isinstance(v, int) or v[0] == "?"}
+        eff_vars = {v for v in self.effect.args
+                    if isinstance(v, int) or v[0] == "?"}
+        assert eff_vars <= cond_vars, self
+    def intern(self, interner):
+        super().intern(interner)
+        # Variables are bound in slots of a list that starts like the
+        # effect; variables that do not occur in the effect come after it.
+        self.effect_length = len(self.effect_template)
+        extra_slots = {}
+        self.var_slots = []
+        for cond in self.conditions:
+            slots = []
+            for fact_pos, arg in enumerate(cond.args, 1):
+                if isinstance(arg, int):
+                    slots.append((arg + 1, fact_pos))
+                elif arg[0] == "?":
+                    slot = extra_slots.setdefault(
+                        arg, self.effect_length + len(extra_slots))
+                    slots.append((slot, fact_pos))
+            self.var_slots.append(slots)
+        self.slots_template = self.effect_template + [None] * len(extra_slots)
+        self.indices = [{} for cond in self.conditions]
+        self.plans = [self._make_plan(cond_index)
+                      for cond_index in range(len(self.conditions))]
+    def _make_plan(self, cond_index):
+        # Order the other conditions greedily, preferring the one with the
+        # most bound variables, and choose the index each step looks up.
+        bound = {slot for slot, _ in self.var_slots[cond_index]}
+        remaining = [pos for pos in range(len(self.conditions))
+                     if pos != cond_index]
+        plan = []
+        while remaining:
+            def num_unbound(pos):
+                return sum(slot not in bound for slot, _ in self.var_slots[pos])
+            def num_bound(pos):
+                return len(self.var_slots[pos]) - num_unbound(pos)
+            pos = min(remaining,
+                      key=lambda pos: (-num_bound(pos), num_unbound(pos)))
+            remaining.remove(pos)
+            key_slots = tuple(slot for slot, _ in self.var_slots[pos]
+                              if slot in bound)
+            key_fact_positions = tuple(
+                fact_pos for slot, fact_pos in self.var_slots[pos]
+                if slot in bound)
+            assignments = [(slot, fact_pos)
+                           for slot, fact_pos in self.var_slots[pos]
+                           if slot not in bound]
+            index = self.indices[pos].get(key_fact_positions)
+            if index is None:
+                index = self.indices[pos][key_fact_positions] = (
+                    make_key_getter(key_fact_positions), {})
+            plan.append((make_key_getter(key_slots), index[1], assignments))
+            bound.update(slot for slot, _ in assignments)
+        return plan
+    def update_index(self, new_fact, cond_index):
+        for key_getter, facts_by_key in self.indices[cond_index].values():
+            facts_by_key.setdefault(key_getter(new_fact), []).append(new_fact)
+    def fire(self, new_fact, cond_index, enqueue_func):
+        slots = list(self.slots_template)
+        for slot, fact_pos in self.var_slots[cond_index]:
+            slots[slot] = new_fact[fact_pos]
+        self._join(slots, self.plans[cond_index], 0, enqueue_func)
+    def _join(self, slots, plan, depth, enqueue_func):
+        key_getter, facts_by_key, assignments = plan[depth]
+        facts = facts_by_key.get(key_getter(slots))
+        if not facts:
+            return
+        last = depth + 1 == len(plan)
+        for fact in facts:
+            for slot, fact_pos in assignments:
+                slots[slot] = fact[fact_pos]
+            if last:
+                enqueue_func(tuple(slots[:self.effect_length]))
+            else:
+                self._join(slots, plan, depth + 1, enqueue_func)
 
 class ProductRule(BuildRule):
     def __init__(self, effect, conditions):
         self.effect = effect
         self.conditions = conditions
-        self.atoms_by_index = [[] for c in self.conditions]
+        # The objects bound by all facts seen so far, per condition: a
+        # bare object for conditions with one variable (typically types),
+        # a tuple otherwise. They are extended as facts arrive rather than
+        # rebuilt on every fire.
+        self.values_by_index = [[] for c in self.conditions]
         self.empty_atom_list_no = len(self.conditions)
     def validate(self):
         assert len(self.conditions) >= 2, self
@@ -125,40 +273,64 @@ class ProductRule(BuildRule):
                     if isinstance(v, int) or v[0] == "?"}
         assert len(all_cond_vars) == len(eff_vars), self
         assert len(all_cond_vars) == sum([len(c) for c in cond_vars])
-    def update_index(self, new_atom, cond_index):
-        atom_list = self.atoms_by_index[cond_index]
-        if not atom_list:
+    def intern(self, interner):
+        super().intern(interner)
+        self.effect_positions = []
+        self.value_getters = []
+        for bindings in self.cond_bindings:
+            self.effect_positions.append([eff_pos for eff_pos, _ in bindings])
+            fact_positions = [fact_pos for _, fact_pos in bindings]
+            self.value_getters.append(make_key_getter(fact_positions))
+        # Ground conditions bind nothing and match a single fact, so they
+        # only need to be non-empty. Leaving them out also keeps the
+        # recursion shallow for goal rules with many ground conditions.
+        num_conditions = len(self.conditions)
+        self.other_conditions = [
+            [pos for pos in range(num_conditions)
+             if pos != cond_index and self.effect_positions[pos]]
+            for cond_index in range(num_conditions)]
+    def update_index(self, new_fact, cond_index):
+        values_list = self.values_by_index[cond_index]
+        if not values_list:
             self.empty_atom_list_no -= 1
-        atom_list.append(new_atom)
+        values_list.append(self.value_getters[cond_index](new_fact))
 
-    def _get_bindings(self, atom, cond):
-        return [(var_no, obj) for var_no, obj in zip(cond.args, atom.args)
-                if isinstance(var_no, int)]
-
-    def fire(self, new_atom, cond_index, enqueue_func):
+    def fire(self, new_fact, cond_index, enqueue_func):
         if self.empty_atom_list_no:
             return
+        effect = self.prepare_effect(new_fact, cond_index)
+        other_conditions = self.other_conditions[cond_index]
+        if other_conditions:
+            self._fire_product(effect, other_conditions, 0, enqueue_func)
+        else:
+            enqueue_func(tuple(effect))
 
-        # Binding: a (var_no, object) pair
-        # Bindings: List-of(Binding)
-        # BindingsFactor: List-of(Bindings)
-        # BindingsFactors: List-of(BindingsFactor)
-        bindings_factors = []
-        for pos, cond in enumerate(self.conditions):
-            if pos == cond_index:
-                continue
-            atoms = self.atoms_by_index[pos]
-            assert atoms, "if we have no atoms, this should never be called"
-            factor = [self._get_bindings(atom, cond) for atom in atoms]
-            bindings_factors.append(factor)
-
-        eff_args = self.prepare_effect(new_atom, cond_index)
-
-        for bindings_list in itertools.product(*bindings_factors):
-            bindings = itertools.chain(*bindings_list)
-            for var_no, obj in bindings:
-                eff_args[var_no] = obj
-            enqueue_func(self.effect.predicate, eff_args)
+    def _fire_product(self, effect, conditions, depth, enqueue_func):
+        # Enumerates the product of the values of the given conditions
+        # like itertools.product, writing each combination into effect in
+        # place instead of building binding lists for it.
+        cond_index = conditions[depth]
+        positions = self.effect_positions[cond_index]
+        values_list = self.values_by_index[cond_index]
+        last = depth + 1 == len(conditions)
+        if len(positions) == 1:
+            eff_pos = positions[0]
+            for obj in values_list:
+                effect[eff_pos] = obj
+                if last:
+                    enqueue_func(tuple(effect))
+                else:
+                    self._fire_product(effect, conditions, depth + 1,
+                                       enqueue_func)
+        else:
+            for values in values_list:
+                for eff_pos, obj in zip(positions, values):
+                    effect[eff_pos] = obj
+                if last:
+                    enqueue_func(tuple(effect))
+                else:
+                    self._fire_product(effect, conditions, depth + 1,
+                                       enqueue_func)
 
 
 class ProjectRule(BuildRule):
@@ -167,42 +339,72 @@ class ProjectRule(BuildRule):
         self.conditions = conditions
     def validate(self):
         assert len(self.conditions) == 1
-    def update_index(self, new_atom, cond_index):
+    def update_index(self, new_fact, cond_index):
         pass
-    def fire(self, new_atom, cond_index, enqueue_func):
-        effect_args = self.prepare_effect(new_atom, cond_index)
-        enqueue_func(self.effect.predicate, effect_args)
+    def fire(self, new_fact, cond_index, enqueue_func):
+        enqueue_func(tuple(self.prepare_effect(new_fact, cond_index)))
+
+class RuleStatistics:
+    def __init__(self):
+        self.fires = 0
+        self.pushes = 0
+        self.new_atoms = 0
+        self.time = 0.0
+
+def fire_profiled(rule, new_fact, cond_index, queue):
+    pushes = queue.num_pushes
+    queue_length = len(queue.queue)
+    start = time.perf_counter()
+    rule.fire(new_fact, cond_index, queue.push)
+    statistics = rule.statistics
+    statistics.time += time.perf_counter() - start
+    statistics.fires += 1
+    statistics.pushes += queue.num_pushes - pushes
+    statistics.new_atoms += len(queue.queue) - queue_length
+
+def print_rule_statistics(rule_statistics):
+    print("Model computation by rule:")
+    print("%10s %10s %10s %8s  %s" % (
+        "fires", "pushes", "duplicates", "time", "rule"))
+    for rule, statistics in sorted(rule_statistics,
+                                   key=lambda item: -item[1].pushes):
+        print("%10d %10d %10d %7.3fs  %s" % (
+            statistics.fires, statistics.pushes,
+            statistics.pushes - statistics.new_atoms, statistics.time, rule))
 
 class Unifier:
-    def __init__(self, rules):
+    def __init__(self, rules, interner):
+        self.interner = interner
         self.predicate_to_rule_generator = {}
         for rule in rules:
             for i, cond in enumerate(rule.conditions):
                 self._insert_condition(rule, i)
-    def unify(self, atom):
+    def unify(self, fact):
         result = []
-        generator = self.predicate_to_rule_generator.get(atom.predicate)
+        generator = self.predicate_to_rule_generator.get(fact[0])
         if generator:
-            generator.generate(atom, result)
+            generator.generate(fact, result)
         return result
     def _insert_condition(self, rule, cond_index):
         condition = rule.conditions[cond_index]
-        root = self.predicate_to_rule_generator.get(condition.predicate)
+        predicate = self.interner.predicate(condition.predicate)
+        root = self.predicate_to_rule_generator.get(predicate)
         if not root:
             root = LeafGenerator()
         constant_arguments = [
-            (arg_index, arg)
-            for (arg_index, arg) in enumerate(condition.args)
+            (fact_pos, self.interner.object(arg))
+            for (fact_pos, arg) in enumerate(condition.args, 1)
             if not isinstance(arg, int) and arg[0] != "?"]
         newroot = root._insert(constant_arguments, (rule, cond_index))
-        self.predicate_to_rule_generator[condition.predicate] = newroot
+        self.predicate_to_rule_generator[predicate] = newroot
     def dump(self):
-        predicates = sorted(self.predicate_to_rule_generator)
+        predicates = sorted(self.predicate_to_rule_generator,
+                            key=lambda number: self.interner.predicates[number])
         print("Unifier:")
         for pred in predicates:
-            print("    %s:" % pred)
+            print("    %s:" % self.interner.predicates[pred])
             rule_gen = self.predicate_to_rule_generator[pred]
-            rule_gen.dump("    " * 2)
+            rule_gen.dump("    " * 2, self.interner)
 
 class LeafGenerator:
     index = sys.maxsize
@@ -210,7 +412,7 @@ class LeafGenerator:
         self.matches = []
     def empty(self):
         return not self.matches
-    def generate(self, atom, result):
+    def generate(self, fact, result):
         result += self.matches
     def _insert(self, args, value):
         if not args:
@@ -225,24 +427,25 @@ class LeafGenerator:
                 root = new_root
             root.matches = self.matches # can be swapped in C++
             return root
-    def dump(self, indent):
+    def dump(self, indent, interner):
         for match in self.matches:
             print("%s%s" % (indent, match))
 
 class MatchGenerator:
     def __init__(self, index, next):
+        # index is a position in the fact tuple, so argument index + 1.
         self.index = index
         self.matches = []
         self.match_generator = {}
         self.next = next
     def empty(self):
         return False
-    def generate(self, atom, result):
+    def generate(self, fact, result):
         result += self.matches
-        generator = self.match_generator.get(atom.args[self.index])
+        generator = self.match_generator.get(fact[self.index])
         if generator:
-            generator.generate(atom, result)
-        self.next.generate(atom, result)
+            generator.generate(fact, result)
+        self.next.generate(fact, result)
     def _insert(self, args, value):
         if not args:
             self.matches.append(value)
@@ -264,33 +467,33 @@ class MatchGenerator:
                 self.match_generator[arg] = branch_generator._insert(
                     args[1:], value)
                 return self
-    def dump(self, indent):
+    def dump(self, indent, interner):
         for match in self.matches:
             print("%s%s" % (indent, match))
-        for key in sorted(self.match_generator.keys()):
-            print("%sargs[%s] == %s:" % (indent, self.index, key))
-            self.match_generator[key].dump(indent + "    ")
+        for key in sorted(self.match_generator.keys(),
+                          key=lambda number: interner.objects[number]):
+            print("%sargs[%s] == %s:" % (indent, self.index - 1,
+                                         interner.objects[key]))
+            self.match_generator[key].dump(indent + "    ", interner)
         if not self.next.empty():
             assert isinstance(self.next, MatchGenerator)
             print("%s[*]" % indent)
-            self.next.dump(indent + "    ")
+            self.next.dump(indent + "    ", interner)
 
 class Queue:
-    def __init__(self, atoms):
-        self.queue = atoms
+    def __init__(self, facts):
+        self.queue = facts
         self.queue_pos = 0
-        self.enqueued = {(atom.predicate,) + tuple(atom.args)
-                         for atom in self.queue}
-        self.num_pushes = len(atoms)
+        self.enqueued = set(facts)
+        self.num_pushes = len(facts)
     def __bool__(self):
         return self.queue_pos < len(self.queue)
     __nonzero__ = __bool__
-    def push(self, predicate, args):
+    def push(self, fact):
         self.num_pushes += 1
-        eff_tuple = (predicate,) + tuple(args)
-        if eff_tuple not in self.enqueued:
-            self.enqueued.add(eff_tuple)
-            self.queue.append(pddl.Atom(predicate, list(args)))
+        if fact not in self.enqueued:
+            self.enqueued.add(fact)
+            self.queue.append(fact)
     def pop(self):
         result = self.queue[self.queue_pos]
         self.queue_pos += 1
@@ -299,31 +502,51 @@ class Queue:
 def compute_model(prog):
     with timers.timing("Preparing model"):
         rules = convert_rules(prog)
-        unifier = Unifier(rules)
+        interner = Interner()
+        for rule in rules:
+            rule.intern(interner)
+        unifier = Unifier(rules, interner)
         # unifier.dump()
         fact_atoms = sorted(fact.atom for fact in prog.facts)
-        queue = Queue(fact_atoms)
+        queue = Queue([interner.fact(atom) for atom in fact_atoms])
+        del fact_atoms
+        profile = options.profile_model
+        if profile:
+            for rule in rules:
+                rule.statistics = RuleStatistics()
 
     print("Generated %d rules." % len(rules))
     with timers.timing("Computing model"):
-        relevant_atoms = 0
-        auxiliary_atoms = 0
         while queue:
-            next_atom = queue.pop()
-            pred = next_atom.predicate
-            if isinstance(pred, str) and "$" in pred:
-                auxiliary_atoms += 1
-            else:
-                relevant_atoms += 1
-            matches = unifier.unify(next_atom)
+            next_fact = queue.pop()
+            matches = unifier.unify(next_fact)
             for rule, cond_index in matches:
-                rule.update_index(next_atom, cond_index)
-                rule.fire(next_atom, cond_index, queue.push)
+                rule.update_index(next_fact, cond_index)
+                if profile:
+                    fire_profiled(rule, next_fact, cond_index, queue)
+                else:
+                    rule.fire(next_fact, cond_index, queue.push)
+        facts = queue.queue
+        num_pushes = queue.num_pushes
+        if profile:
+            statistics = [(rule, rule.statistics) for rule in rules]
+        # Free the rule indices and the duplicate check, and replace the
+        # facts by atoms in place, so that the two representations of the
+        # model never coexist.
+        del rules, unifier, queue
+        is_auxiliary = [isinstance(pred, str) and "$" in pred
+                        for pred in interner.predicates]
+        auxiliary_atoms = sum(1 for fact in facts if is_auxiliary[fact[0]])
+        relevant_atoms = len(facts) - auxiliary_atoms
+        for i, fact in enumerate(facts):
+            facts[i] = interner.atom(fact)
     print("%d relevant atoms" % relevant_atoms)
     print("%d auxiliary atoms" % auxiliary_atoms)
-    print("%d final queue length" % len(queue.queue))
-    print("%d total queue pushes" % queue.num_pushes)
-    return queue.queue
+    print("%d final queue length" % len(facts))
+    print("%d total queue pushes" % num_pushes)
+    if profile:
+        print_rule_statistics(statistics)
+    return facts
 
 if __name__ == "__main__":
     import pddl_parser
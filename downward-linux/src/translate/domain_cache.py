@@ -0,0 +1,87 @@
+"""Content-addressed on-disk cache for translator results (invariants
+of a domain, parsed tasks).
+
+Entries are pickles named after the SHA-256 of everything the result
+depends on, including the translator source, so they never need to be
+invalidated: a changed input, option or translator simply has a
+different key. Several translator processes may share a cache
+directory; entries are written atomically."""
+
+import contextlib
+import gc
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+
+TRANSLATE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_source_version = None
+
+
+def get_source_version():
+    """Return a hash of the translator's Python sources."""
+    global _source_version
+    if _source_version is None:
+        digest = hashlib.sha256()
+        for dirpath, dirnames, filenames in os.walk(TRANSLATE_DIR):
+            dirnames[:] = sorted(d for d in dirnames if d != "tests")
+            for filename in sorted(filenames):
+                if filename.endswith(".py"):
+                    with open(os.path.join(dirpath, filename), "rb") as source_file:
+                        digest.update(source_file.read())
+        _source_version = digest.hexdigest()
+    return _source_version
+
+
+def hash_file(filename):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as input_file:
+        for block in iter(lambda: input_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(kind, *parts):
+    digest = hashlib.sha256()
+    for part in (get_source_version(), kind) + parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return "%s-%s" % (kind, digest.hexdigest())
+
+
+def dump_to_string(obj):
+    """Return what obj.dump() prints, as a fingerprint of pddl objects
+    that have no canonical string representation."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        obj.dump()
+    return output.getvalue()
+
+
+def load(cache_dir, key):
+    # Unpickling a large task creates millions of objects; pause the cycle
+    # collector meanwhile as in lisp_parser.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(os.path.join(cache_dir, key + ".pickle"), "rb") as cache_file:
+            return pickle.load(cache_file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def store(cache_dir, key, value):
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            pickle.dump(value, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, os.path.join(cache_dir, key + ".pickle"))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 import invariant_finder
 import options
 import pddl
@@ -8,29 +10,57 @@ from typing import Dict, List, Set, Tuple
 DEBUG = False
 
 
-def expand_group(group, task, reachable_facts):
+def get_counted_position(fact):
+    """Return the position of ?X in the arguments of a group fact, or None
+    if the fact is ground."""
+    try:
+        return fact.args.index("?X")
+    except ValueError:
+        return None
+
+def get_index_key(predicate, args, pos):
+    return predicate, pos, args[:pos] + args[pos + 1:]
+
+def build_fact_index(groups, task, reachable_facts):
+    """Map (predicate, pos, other args) to the reachable facts with these
+    other arguments that have an object at position pos, in the order of
+    task.objects. This is what expand_group would find by trying all
+    objects at the ?X position of a group fact."""
+    positions_by_predicate = defaultdict(set)
+    for group in groups:
+        for fact in group:
+            pos = get_counted_position(fact)
+            if pos is not None:
+                positions_by_predicate[fact.predicate].add(pos)
+    object_numbers = {obj.name: number
+                      for number, obj in enumerate(task.objects)}
+    index = defaultdict(list)
+    for fact in reachable_facts:
+        for pos in positions_by_predicate.get(fact.predicate, ()):
+            if pos < len(fact.args):
+                object_number = object_numbers.get(fact.args[pos])
+                if object_number is not None:
+                    key = get_index_key(fact.predicate, fact.args, pos)
+                    index[key].append((object_number, fact))
+    return {key: [fact for _, fact in sorted(entries)]
+            for key, entries in index.items()}
+
+def expand_group(group, reachable_facts, fact_index):
     result = []
     for fact in group:
-        try:
-            pos = list(fact.args).index("?X")
-        except ValueError:
+        pos = get_counted_position(fact)
+        if pos is None:
             if fact in reachable_facts:
                 result.append(fact)
         else:
-            # NOTE: This could be optimized by only trying objects of the correct
-            #       type, or by using a unifier which directly generates the
-            #       applicable objects. It is not worth optimizing this at this stage,
-            #       though.
-            for obj in task.objects:
-                newargs = list(fact.args)
-                newargs[pos] = obj.name
-                atom = pddl.Atom(fact.predicate, newargs)
-                if atom in reachable_facts:
-                    result.append(atom)
+            key = get_index_key(fact.predicate, fact.args, pos)
+            result += fact_index.get(key, [])
     return result
 
 def instantiate_groups(groups, task, reachable_facts):
-    return [expand_group(group, task, reachable_facts) for group in groups]
+    fact_index = build_fact_index(groups, task, reachable_facts)
+    return [expand_group(group, reachable_facts, fact_index)
+            for group in groups]
 
 class GroupCoverQueue:
     def __init__(self, groups):
@@ -2,11 +2,14 @@
 
 
 from collections import defaultdict
-from typing import Any, Dict, List, Optional, Set, Tuple
+import multiprocessing
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 import build_model
+import options
 import pddl_to_prolog
 import pddl
+import relevance
 import timers
 
 def get_fluent_facts(task, model):
@@ -16,7 +19,7 @@ def get_fluent_facts(task, model):
             fluent_predicates.add(effect.literal.predicate)
     for axiom in task.axioms:
         fluent_predicates.add(axiom.name)
-    return {fact for fact in model
+    return {pddl.Atom.intern(fact.predicate, fact.args) for fact in model
             if fact.predicate in fluent_predicates}
 
 def get_objects_by_type(typed_objects, types):
@@ -51,12 +54,114 @@ def instantiate_goal(goal, init_facts, fluent_facts):
         return None
     return result
 
+# Number of action atoms sent to a worker process at a time by
+# instantiate_actions_in_parallel.
+CHUNK_SIZE = 1000
+
+# What the worker processes need besides the action atoms. It is set before
+# the workers are forked, so they inherit it instead of receiving a copy.
+_worker_context = None
+
+def _instantiate_chunk(chunk):
+    (actions, init_facts, init_assignments, fluent_facts, type_to_objects,
+     metric) = _worker_context
+    result = []
+    for action_no, args in chunk:
+        action = actions[action_no]
+        variable_mapping = {par.name: arg
+                            for par, arg in zip(action.parameters, args)}
+        inst_action = action.instantiate(
+            variable_mapping, init_facts, init_assignments,
+            fluent_facts, type_to_objects, metric)
+        if inst_action:
+            result.append(inst_action)
+    return result
+
+def can_instantiate_in_parallel():
+    # Workers are forked to share the task. A daemonic process (e.g. a
+    # worker of a pool that translates several tasks) cannot have children.
+    return ("fork" in multiprocessing.get_all_start_methods() and
+            not multiprocessing.current_process().daemon)
+
+def intern_literal(literal):
+    return literal.__class__.intern(literal.predicate, literal.args)
+
+def intern_action_literals(action):
+    """Replace the literals of an action instantiated in a worker process,
+    which arrive as copies, by the interned ones of this process."""
+    action.precondition = [intern_literal(cond) for cond in action.precondition]
+    action.add_effects = [([intern_literal(cond) for cond in conditions],
+                           intern_literal(effect))
+                          for conditions, effect in action.add_effects]
+    action.del_effects = [([intern_literal(cond) for cond in conditions],
+                           intern_literal(effect))
+                          for conditions, effect in action.del_effects]
+    return action
+
+def instantiate_actions_in_parallel(task, action_atoms, init_facts,
+                                    init_assignments, fluent_facts,
+                                    type_to_objects, jobs):
+    """Instantiate the given action atoms in jobs worker processes. The
+    result is in the order of action_atoms, as in the serial loop. It is
+    generated one chunk at a time."""
+    global _worker_context
+    action_numbers = {action: action_no
+                      for action_no, action in enumerate(task.actions)}
+    chunks = []
+    for start in range(0, len(action_atoms), CHUNK_SIZE):
+        chunks.append([(action_numbers[atom.predicate], atom.args)
+                       for atom in action_atoms[start:start + CHUNK_SIZE]])
+    _worker_context = (task.actions, init_facts, init_assignments,
+                       fluent_facts, type_to_objects, task.use_min_cost_metric)
+    try:
+        with multiprocessing.get_context("fork").Pool(jobs) as pool:
+            for inst_actions in pool.imap(_instantiate_chunk, chunks):
+                for inst_action in inst_actions:
+                    yield intern_action_literals(inst_action)
+    finally:
+        _worker_context = None
+
+class InstantiatedActions:
+    """The actions instantiated from the given action atoms, in their
+    order. They are instantiated anew whenever the object is iterated over,
+    so with --streaming-output, where instantiate returns this object
+    instead of a list, no more than a chunk of them is kept in memory."""
+    def __init__(self, task, action_atoms, init_facts, init_assignments,
+                 fluent_facts, type_to_objects):
+        self.task = task
+        self.action_atoms = action_atoms
+        self.init_facts = init_facts
+        self.init_assignments = init_assignments
+        self.fluent_facts = fluent_facts
+        self.type_to_objects = type_to_objects
+
+    def __iter__(self):
+        jobs = options.instantiate_jobs
+        if jobs > 1 and can_instantiate_in_parallel():
+            return instantiate_actions_in_parallel(
+                self.task, self.action_atoms, self.init_facts,
+                self.init_assignments, self.fluent_facts,
+                self.type_to_objects, jobs)
+        return self._instantiate_serially()
+
+    def _instantiate_serially(self):
+        for atom in self.action_atoms:
+            action = atom.predicate
+            variable_mapping = {par.name: arg
+                                for par, arg in zip(action.parameters, atom.args)}
+            inst_action = action.instantiate(
+                variable_mapping, self.init_facts, self.init_assignments,
+                self.fluent_facts, self.type_to_objects,
+                self.task.use_min_cost_metric)
+            if inst_action:
+                yield inst_action
+
 # The input task must have been normalized
 # The model has been computed by build_model.compute_model
 def instantiate(task: pddl.Task, model: Any) -> Tuple[
              bool, # relaxed_reachable
              Set[pddl.Literal], # fluent_facts (ground)
-             List[pddl.PropositionalAction], # instantiated_actions
+             Iterable[pddl.PropositionalAction], # instantiated_actions
              Optional[List[pddl.Literal]], # instantiated_goal
              List[pddl.PropositionalAxiom], # instantiated_axioms
              Dict[pddl.Action, List[str]] # reachable_action_parameters
@@ -69,11 +174,11 @@ def instantiate(task: pddl.Task, model: Any) -> Tuple[
         if isinstance(element, pddl.Assign):
             init_assignments[element.fluent] = element.expression
         else:
-            init_facts.add(element)
+            init_facts.add(pddl.Atom.intern(element.predicate, element.args))
 
     type_to_objects = get_objects_by_type(task.objects, task.types)
 
-    instantiated_actions = []
+    action_atoms = []
     instantiated_axioms = []
     reachable_action_parameters = defaultdict(list)
     for atom in model:
@@ -87,14 +192,7 @@ def instantiate(task: pddl.Task, model: Any) -> Tuple[
             # actions with the same name after normalization, and we
             # want to distinguish their instantiations.
             reachable_action_parameters[action].append(inst_parameters)
-            variable_mapping = {par.name: arg
-                                for par, arg in zip(parameters, atom.args)}
-            inst_action = action.instantiate(
-                variable_mapping, init_facts, init_assignments,
-                fluent_facts, type_to_objects,
-                task.use_min_cost_metric)
-            if inst_action:
-                instantiated_actions.append(inst_action)
+            action_atoms.append(atom)
         elif isinstance(atom.predicate, pddl.Axiom):
             axiom = atom.predicate
             variable_mapping = {par.name: arg
@@ -105,6 +203,12 @@ def instantiate(task: pddl.Task, model: Any) -> Tuple[
         elif atom.predicate == "@goal-reachable":
             relaxed_reachable = True
 
+    instantiated_actions = InstantiatedActions(
+        task, action_atoms, init_facts, init_assignments, fluent_facts,
+        type_to_objects)
+    if not options.streaming_output:
+        instantiated_actions = list(instantiated_actions)
+
     instantiated_goal = instantiate_goal(task.goal, init_facts, fluent_facts)
 
     return (relaxed_reachable, fluent_facts,
@@ -113,7 +217,18 @@ def instantiate(task: pddl.Task, model: Any) -> Tuple[
 
 
 def explore(task):
-    prog = pddl_to_prolog.translate(task)
+    relevant_parameters = None
+    if options.relevance_analysis:
+        with timers.timing("Computing relevant actions", block=True):
+            type_to_objects = get_objects_by_type(task.objects, task.types)
+            relevant_parameters = relevance.compute_relevant_parameters(
+                task, type_to_objects)
+            num_restricted = sum(domain is not None
+                                 for domains in relevant_parameters.values()
+                                 for domain in domains)
+            print("%d of %d actions relevant, %d parameters restricted" % (
+                len(relevant_parameters), len(task.actions), num_restricted))
+    prog = pddl_to_prolog.translate(task, relevant_parameters)
     model = build_model.compute_model(prog)
     with timers.timing("Completing instantiation"):
         return instantiate(task, model)
@@ -7,6 +7,7 @@ import random
 import time
 from typing import List
 
+import domain_cache
 import invariants
 import options
 import pddl
@@ -48,17 +49,7 @@ class BalanceChecker:
         return self.action_to_heavy_action[action]
 
     def add_inequality_preconds(self, action, reachable_action_params):
-        if reachable_action_params is None or len(action.parameters) < 2:
-            return action
-        inequal_params = []
-        combs = itertools.combinations(range(len(action.parameters)), 2)
-        for pos1, pos2 in combs:
-            for params in reachable_action_params[action]:
-                if params[pos1] == params[pos2]:
-                    break
-            else:
-                inequal_params.append((pos1, pos2))
-
+        inequal_params = get_inequal_params(action, reachable_action_params)
         if inequal_params:
             precond_parts = [action.precondition]
             for pos1, pos2 in inequal_params:
@@ -73,6 +64,21 @@ class BalanceChecker:
         else:
             return action
 
+def get_inequal_params(action, reachable_action_params):
+    """Return the pairs of parameter positions that never take the same
+    object in the reachable instantiations of action."""
+    if reachable_action_params is None or len(action.parameters) < 2:
+        return []
+    inequal_params = []
+    combs = itertools.combinations(range(len(action.parameters)), 2)
+    for pos1, pos2 in combs:
+        for params in reachable_action_params[action]:
+            if params[pos1] == params[pos2]:
+                break
+        else:
+            inequal_params.append((pos1, pos2))
+    return inequal_params
+
 def get_fluents(task):
     fluent_names = set()
     for action in task.actions:
@@ -141,10 +147,37 @@ def useful_groups(invariants, initial_facts):
     for (invariant, parameters) in useful_groups:
         yield [part.instantiate(parameters) for part in sorted(invariant.parts)]
 
+def get_schema_fingerprint(task, reachable_action_params):
+    """The invariants found only depend on the normalized predicates and
+    actions, and on which parameters of an action are known to differ.
+    All problems of a domain usually share this fingerprint."""
+    parts = [str(pred) for pred in task.predicates]
+    for action in task.actions:
+        parts.append(domain_cache.dump_to_string(action))
+        parts.append(get_inequal_params(action, reachable_action_params))
+    return parts
+
+def find_invariants_cached(task, reachable_action_params):
+    if not options.domain_cache:
+        return list(find_invariants(task, reachable_action_params))
+    key = domain_cache.make_key(
+        "invariants", options.invariant_generation_max_candidates,
+        *get_schema_fingerprint(task, reachable_action_params))
+    invariants = domain_cache.load(options.domain_cache, key)
+    if invariants is not None:
+        print("Loaded %d invariants from domain cache" % len(invariants))
+        return invariants
+    start_time = time.process_time()
+    invariants = list(find_invariants(task, reachable_action_params))
+    # A run cut short by the time limit is not reproducible, don't cache it.
+    if time.process_time() - start_time <= options.invariant_generation_max_time:
+        domain_cache.store(options.domain_cache, key, invariants)
+    return invariants
+
 # returns a list of mutex groups (parameters instantiated, counted variables not)
 def get_groups(task, reachable_action_params=None) -> List[List[pddl.Atom]]:
     with timers.timing("Finding invariants", block=True):
-        invariants = list(find_invariants(task, reachable_action_params))
+        invariants = find_invariants_cached(task, reachable_action_params)
     with timers.timing("Checking invariant weight"):
         result = list(useful_groups(invariants, task.init))
     return result
@@ -2,7 +2,7 @@ import argparse
 import sys
 
 
-def parse_args():
+def get_argparser():
     argparser = argparse.ArgumentParser()
     argparser.add_argument(
         "domain", help="path to domain pddl file")
@@ -31,6 +31,14 @@ def parse_args():
     argparser.add_argument(
         "--invariant-generation-max-time", default=300, type=int,
         help="max time for invariant generation (default: %(default)ds)")
+    argparser.add_argument(
+        "--domain-cache", metavar="DIR",
+        help="cache domain-level results such as invariants in DIR and "
+        "reuse them for other problems of the same domain")
+    argparser.add_argument(
+        "--parse-cache", metavar="DIR",
+        help="cache parsed tasks in DIR, keyed by the hashes of the "
+        "domain and task files, and skip parsing when they are found")
     argparser.add_argument(
         "--add-implied-preconditions", action="store_true",
         help="infer additional preconditions. This setting can cause a "
@@ -49,6 +57,30 @@ def parse_args():
         "--keep-unimportant-variables",
         dest="filter_unimportant_vars", action="store_false",
         help="keep variables that do not influence the goal in the causal graph")
+    argparser.add_argument(
+        "--instantiate-jobs", metavar="N", default=1, type=int,
+        help="instantiate actions in N worker processes (default: "
+        "%(default)d). The result is the same as with one process.")
+    argparser.add_argument(
+        "--streaming-output", action="store_true",
+        help="instantiate actions on demand and keep the translated operators "
+        "in a temporary file instead of in memory while simplifying, "
+        "reordering and writing the task. Needs much less memory for tasks "
+        "with many operators, but is slower. The output is the same.")
+    argparser.add_argument(
+        "--relevance-analysis", action="store_true",
+        help="before grounding, discard actions (and action parameters) "
+        "that cannot contribute to the goal, using a backward pass from "
+        "the goal over the lifted task")
+    argparser.add_argument(
+        "--multiway-joins", action="store_true",
+        help="evaluate Datalog rules with three or more connected conditions "
+        "with one multi-way hash join instead of splitting them into binary "
+        "joins with auxiliary predicates")
+    argparser.add_argument(
+        "--profile-model", action="store_true",
+        help="print how often each Datalog rule fired while computing the "
+        "relaxed reachable model, and how many (duplicate) atoms it pushed")
     argparser.add_argument(
         "--dump-task", action="store_true",
         help="dump human-readable SAS+ representation of the task")
@@ -57,7 +89,21 @@ def parse_args():
         help="How to assign layers to derived variables. 'min' attempts to put as "
         "many variables into the same layer as possible, while 'max' puts each variable "
         "into its own layer unless it is part of a cycle.")
-    return argparser.parse_args()
+    return argparser
+
+
+def parse_args(args=None):
+    return get_argparser().parse_args(args)
+
+
+def get_defaults():
+    """Return the default value of every option, with domain and task
+    set to None."""
+    defaults = {}
+    for action in get_argparser()._actions:
+        if action.dest != "help":
+            defaults[action.dest] = action.default
+    return defaults
 
 
 def copy_args_to_module(args):
@@ -66,9 +112,25 @@ def copy_args_to_module(args):
         module_dict[key] = value
 
 
-def setup():
-    args = parse_args()
-    copy_args_to_module(args)
+def setup(args=None):
+    """Set the options from the command line (or the given list of
+    arguments)."""
+    copy_args_to_module(parse_args(args))
+
+
+def configure(**kwargs):
+    """Reset all options to their defaults, then apply kwargs. This is
+    how library users set options, without touching sys.argv."""
+    values = get_defaults()
+    unknown = set(kwargs) - set(values)
+    if unknown:
+        raise TypeError("unknown translator options: %s" %
+                        ", ".join(sorted(unknown)))
+    values.update(kwargs)
+    copy_args_to_module(argparse.Namespace(**values))
 
 
-setup()
+# Importing this module no longer parses sys.argv, so the translator can
+# be used as a library. Scripts call setup() (pddl_parser.open() does so
+# if no file names are given and none have been set).
+configure()
@@ -42,7 +42,7 @@ class Axiom:
 
         effect_args = [var_mapping.get(arg.name, arg.name)
                        for arg in self.parameters[:self.num_external_parameters]]
-        effect = conditions.Atom(self.name, effect_args)
+        effect = conditions.Atom.intern(self.name, effect_args)
         return PropositionalAxiom(name, condition, effect)
 
 
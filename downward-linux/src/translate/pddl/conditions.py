@@ -14,6 +14,10 @@ class Condition:
         self.hash = hash((self.__class__, self.parts))
     def __hash__(self):
         return self.hash
+    def __reduce__(self):
+        # Pickle without the precomputed hash: string hashes differ
+        # between Python processes.
+        return (self.__class__, (self.parts,))
     def __ne__(self, other):
         return not self == other
     def __lt__(self, other):
@@ -79,6 +83,8 @@ class ConstantCondition(Condition):
     parts = ()
     def __init__(self):
         self.hash = hash(self.__class__)
+    def __reduce__(self):
+        return (self.__class__, ())
     def change_parts(self, parts):
         return self
     def __eq__(self, other):
@@ -168,6 +174,8 @@ class QuantifiedCondition(Condition):
         self.parameters = tuple(parameters)
         self.parts = tuple(parts)
         self.hash = hash((self.__class__, self.parameters, self.parts))
+    def __reduce__(self):
+        return (self.__class__, (self.parameters, self.parts))
     def __eq__(self, other):
         # Compare hash first for speed reasons.
         return (self.hash == other.hash and
@@ -221,6 +229,14 @@ class ExistentialCondition(QuantifiedCondition):
     def has_existential_part(self):
         return True
 
+# Literals created with Literal.intern, by (class, predicate, args).
+_interned_literals = {}
+
+def clear_interned_literals():
+    """Forget the literals created with Literal.intern so far. Literals
+    interned afterwards are new objects."""
+    _interned_literals.clear()
+
 class Literal(Condition):
     # Defining __eq__ blocks inheritance of __hash__, so must set it explicitly.
     __hash__ = Condition.__hash__
@@ -230,6 +246,23 @@ class Literal(Condition):
         self.predicate = predicate
         self.args = tuple(args)
         self.hash = hash((self.__class__, self.predicate, self.args))
+    @classmethod
+    def intern(cls, predicate, args):
+        """Return cls(predicate, args), the same object for all calls with
+        equal arguments (until clear_interned_literals is called).
+
+        Used for ground literals while instantiating, so that the same
+        fact is not allocated again for every action that mentions it,
+        and set and dict lookups find it by identity instead of calling
+        __eq__."""
+        args = tuple(args)
+        key = (cls, predicate, args)
+        literal = _interned_literals.get(key)
+        if literal is None:
+            literal = _interned_literals[key] = cls(predicate, args)
+        return literal
+    def __reduce__(self):
+        return (self.__class__, (self.predicate, self.args))
     def __eq__(self, other):
         # Compare hash first for speed reasons.
         return (self.hash == other.hash and
@@ -271,8 +304,8 @@ class Atom(Literal):
     def to_untyped_strips(self):
         return [self]
     def instantiate(self, var_mapping, init_facts, fluent_facts, result):
-        args = [var_mapping.get(arg, arg) for arg in self.args]
-        atom = Atom(self.predicate, args)
+        args = tuple([var_mapping.get(arg, arg) for arg in self.args])
+        atom = Atom.intern(self.predicate, args)
         if atom in fluent_facts:
             result.append(atom)
         elif atom not in init_facts:
@@ -287,10 +320,10 @@ class NegatedAtom(Literal):
     def _relaxed(self, parts):
         return Truth()
     def instantiate(self, var_mapping, init_facts, fluent_facts, result):
-        args = [var_mapping.get(arg, arg) for arg in self.args]
-        atom = Atom(self.predicate, args)
+        args = tuple([var_mapping.get(arg, arg) for arg in self.args])
+        atom = Atom.intern(self.predicate, args)
         if atom in fluent_facts:
-            result.append(NegatedAtom(self.predicate, args))
+            result.append(NegatedAtom.intern(self.predicate, args))
         elif atom in init_facts:
             raise Impossible()
     def negate(self):
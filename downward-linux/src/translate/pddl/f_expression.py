@@ -35,6 +35,10 @@ class PrimitiveNumericExpression(FunctionalExpression):
         self.hash = hash((self.__class__, self.symbol, self.args))
     def __hash__(self):
         return self.hash
+    def __reduce__(self):
+        # Pickle without the precomputed hash: string hashes differ
+        # between Python processes.
+        return (self.__class__, (self.symbol, self.args))
     def __eq__(self, other):
         return (self.__class__ == other.__class__ and self.symbol == other.symbol
                 and self.args == other.args)
@@ -1,41 +1,87 @@
 __all__ = ["parse_nested_list"]
 
+import gc
+import re
+
 from .parse_error import ParseError
 
+# Parentheses and the runs of atoms between them. Runs are split into tokens
+# with str.split, so most facts cost three loop iterations, not one per token.
+SEGMENT_RE = re.compile(r"[()]|[^()\s][^()]*")
+COMMENT_RE = re.compile(r";[^\n]*")
+
 # Basic functions for parsing PDDL (Lisp) files.
 def parse_nested_list(input_file):
-    tokens = tokenize(input_file)
-    next_token = next(tokens)
-    if next_token != "(":
-        raise ParseError(f"Expected '(', got '{next_token}'.")
-    result = list(parse_list_aux(tokens))
-    remaining_tokens = list(tokens)
-    if remaining_tokens:
-        raise ParseError(f"Tokens remaining after parsing: "
-                         f"{' '.join(remaining_tokens)}")
-    return result
-
-def tokenize(input):
-    for line in input:
+    # The result has no reference cycles, but the millions of lists of a
+    # large grounded problem would trigger the cycle collector over and
+    # over, so it is paused while building them.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return build_nested_list(read_segments(input_file))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def build_nested_list(segments):
+    first_token = next(iter_tokens(segments))
+    if first_token != "(":
+        raise ParseError(f"Expected '(', got '{first_token}'.")
+
+    # Iterative list builder: stack holds the enclosing lists of current.
+    result = current = []
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    segment_iter = iter(segments)
+    next(segment_iter)  # The leading "(".
+    for segment in segment_iter:
+        if segment == "(":
+            nested = []
+            current.append(nested)
+            push(current)
+            current = nested
+        elif segment == ")":
+            if not stack:
+                remaining_tokens = list(iter_tokens(segment_iter))
+                if remaining_tokens:
+                    raise ParseError(f"Tokens remaining after parsing: "
+                                     f"{' '.join(remaining_tokens)}")
+                return result
+            current = pop()
+        else:
+            current += segment.split()
+    raise ParseError("Missing ')'")
+
+def read_segments(input):
+    """Return input (a file or an iterable of lines) lower-cased and with
+    comments removed, as a list of "(", ")" and the text between them."""
+    text = input.read() if hasattr(input, "read") else "".join(input)
+    stripped = COMMENT_RE.sub("", text)
+    if not stripped.isascii():
+        raise_non_ascii_error(text)
+    # A "?" always starts a new token, as in "?x?y" -> "?x", "?y".
+    stripped = stripped.lower().replace("?", " ?")
+    return SEGMENT_RE.findall(stripped)
+
+def iter_tokens(segments):
+    for segment in segments:
+        if segment == "(" or segment == ")":
+            yield segment
+        else:
+            yield from segment.split()
+
+def raise_non_ascii_error(text):
+    # Reports the same error as a parser that reads the file line by line:
+    # a first token other than "(" before the offending line wins.
+    first_tokens = []
+    for line in re.findall(r"[^\n]*\n|[^\n]+", text):
         line = line.split(";", 1)[0]  # Strip comments.
         try:
             line.encode("ascii")
         except UnicodeEncodeError:
+            if first_tokens and first_tokens[0] != "(":
+                raise ParseError(f"Expected '(', got '{first_tokens[0]}'.")
             raise ParseError(f"Non-ASCII character outside comment: {line[0:-1]}")
-        line = line.replace("(", " ( ").replace(")", " ) ").replace("?", " ?")
-        for token in line.split():
-            yield token.lower()
-
-def parse_list_aux(tokenstream):
-    # Leading "(" has already been swallowed.
-    while True:
-        try:
-            token = next(tokenstream)
-        except StopIteration:
-            raise ParseError("Missing ')'")
-        if token == ")":
-            return
-        elif token == "(":
-            yield list(parse_list_aux(tokenstream))
-        else:
-            yield token
+        if not first_tokens:
+            first_tokens = list(iter_tokens(SEGMENT_RE.findall(line.lower().replace("?", " ?"))))
@@ -24,12 +24,14 @@ def parse_pddl_file(type, filename):
 
 def open(domain_filename=None, task_filename=None):
     if domain_filename is None or task_filename is None:
-        # Importing options triggers parsing the problem and domain file names
-        # as arguments from the command line. We don't import unconditionally
-        # at the head of this file because open is exposed in __init__.py
-        # and as a result importing anything of the pddl_parser package in
-        # external code would then trigger this arg parse.
+        # Fall back to the problem and domain file names given on the
+        # command line, parsing it if no one has done so yet. We don't
+        # import options at the head of this file because open is exposed
+        # in __init__.py and the options module is only found if the
+        # translate directory is on the path.
         import options
+        if options.domain is None:
+            options.setup()
         domain_filename = domain_filename or options.domain
         task_filename = task_filename or options.task
 
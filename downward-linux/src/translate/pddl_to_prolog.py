@@ -45,6 +45,31 @@ class PrologProgram:
         for rule in self.rules:
             new_rules += split_rules.split_rule(rule, self.new_name)
         self.rules = new_rules
+    def restrict_to_relevant_actions(self, relevant_parameters):
+        """Remove the rules for actions that are not in relevant_parameters
+        (see relevance.compute_relevant_parameters) and require the
+        parameters of the others to take relevant objects."""
+        domain_predicates = {}
+        new_rules = []
+        for rule in self.rules:
+            action = rule.effect.predicate
+            if isinstance(action, pddl.Action):
+                if action not in relevant_parameters:
+                    continue
+                for var, domain in zip(rule.effect.args,
+                                       relevant_parameters[action]):
+                    if domain is None:
+                        continue
+                    domain = frozenset(domain)
+                    predicate = domain_predicates.get(domain)
+                    if predicate is None:
+                        predicate = "@relevant-%d" % len(domain_predicates)
+                        domain_predicates[domain] = predicate
+                        for obj in sorted(domain):
+                            self.add_fact(pddl.Atom(predicate, [obj]))
+                    rule.add_condition(pddl.Atom(predicate, [var]))
+            new_rules.append(rule)
+        self.rules = new_rules
     def remove_free_effect_variables(self):
         """Remove free effect variables like the variable Y in the rule
         p(X, Y) :- q(X). This is done by introducing a new predicate
@@ -160,13 +185,15 @@ def translate_facts(prog, task):
             # fact.fluent has been defined.
             prog.add_fact(normalize.get_pne_definition_predicate(fact.fluent))
 
-def translate(task):
+def translate(task, relevant_parameters=None):
     # Note: The function requires that the task has been normalized.
     with timers.timing("Generating Datalog program"):
         prog = PrologProgram()
         translate_facts(prog, task)
         for conditions, effect in normalize.build_exploration_rules(task):
             prog.add_rule(Rule(conditions, effect))
+        if relevant_parameters is not None:
+            prog.restrict_to_relevant_actions(relevant_parameters)
     with timers.timing("Normalizing Datalog program", block=True):
         # Using block=True because normalization can output some messages
         # in rare cases.
@@ -0,0 +1,166 @@
+"""Backward relevance analysis on the lifted (normalized) task. Usage:
+
+    relevant_parameters = relevance.compute_relevant_parameters(
+        task, type_to_objects)
+
+An atom is relevant if it occurs in the goal or in a condition of a
+relevant action or axiom, and an action is relevant if one of its
+effects adds or deletes a relevant atom. Removing all other actions does
+not change whether (or how cheaply) the task can be solved: they cannot
+affect the goal or any precondition of the actions that do.
+
+The analysis is done on the lifted task before grounding. It only keeps
+track of which objects may occur at each argument position of each
+predicate, so it over-approximates the set of relevant atoms. This is
+coarse, but enough to discard the actions on, e.g., packages that do
+not occur in the goal of a logistics task.
+"""
+
+import normalize
+import pddl
+
+
+def get_literals(condition):
+    if isinstance(condition, pddl.ExistentialCondition):
+        condition = condition.parts[0]
+    if isinstance(condition, pddl.Literal):
+        return [condition]
+    if isinstance(condition, pddl.Conjunction):
+        assert all(isinstance(part, pddl.Literal) for part in condition.parts), \
+            "Condition not normalized: %r" % condition
+        return condition.parts
+    assert isinstance(condition, (pddl.Truth, pddl.Falsity)), \
+        "Condition not normalized: %r" % condition
+    return []
+
+
+class RelevanceAnalysis:
+    def __init__(self, task, type_to_objects):
+        self.task = task
+        self.type_to_objects = type_to_objects
+        self.all_objects = {obj.name for obj in task.objects}
+        # predicate -> one set of objects per argument position
+        self.relevant_args = {}
+        self.changed = False
+
+    def get_domain(self, type_map, variable):
+        type_name = type_map.get(variable, "object")
+        if type_name == "object":
+            return self.all_objects
+        return set(self.type_to_objects.get(type_name, ()))
+
+    def get_arg_domain(self, arg, domains):
+        if arg.startswith("?"):
+            return domains[arg]
+        return {arg}
+
+    def mark_relevant(self, literal, domains):
+        if literal.predicate == "=":
+            return
+        relevant_args = self.relevant_args.get(literal.predicate)
+        if relevant_args is None:
+            relevant_args = [set() for _ in literal.args]
+            self.relevant_args[literal.predicate] = relevant_args
+        for relevant, arg in zip(relevant_args, literal.args):
+            domain = self.get_arg_domain(arg, domains)
+            if not domain <= relevant:
+                relevant |= domain
+                self.changed = True
+
+    def match(self, literal, domains):
+        """Return the domains of the variables of literal restricted to
+        the instantiations that are relevant, or None if there are none."""
+        relevant_args = self.relevant_args.get(literal.predicate)
+        if relevant_args is None:
+            return None
+        restricted = {}
+        for relevant, arg in zip(relevant_args, literal.args):
+            domain = restricted.get(arg) or self.get_arg_domain(arg, domains)
+            domain = domain & relevant
+            if not domain:
+                return None
+            if arg.startswith("?"):
+                restricted[arg] = domain
+        return restricted
+
+    def get_variable_domains(self, type_map, variables, condition):
+        domains = {}
+        for var in variables:
+            domains[var] = self.get_domain(type_map, var)
+        for part in get_literals(condition):
+            for arg in part.args:
+                if arg.startswith("?") and arg not in domains:
+                    domains[arg] = self.get_domain(type_map, arg)
+        return domains
+
+    def update_action(self, action, action_domains):
+        variables = normalize.get_action_predicate(action).args
+        base_domains = self.get_variable_domains(
+            action.type_map, variables, action.precondition)
+        relevant_domains = action_domains.get(action)
+        for effect in action.effects:
+            effect_domains = dict(base_domains)
+            for par in effect.parameters:
+                effect_domains[par.name] = self.get_domain(
+                    action.type_map, par.name)
+            for var, domain in self.get_variable_domains(
+                    action.type_map, [], effect.condition).items():
+                effect_domains.setdefault(var, domain)
+            restricted = self.match(effect.literal, effect_domains)
+            if restricted is None:
+                continue
+            if relevant_domains is None:
+                relevant_domains = action_domains[action] = {
+                    var: set() for var in variables}
+            for var in variables:
+                relevant_domains[var] |= restricted.get(var, base_domains[var])
+            effect_domains.update(relevant_domains)
+            for literal in get_literals(effect.condition):
+                self.mark_relevant(literal, effect_domains)
+        if relevant_domains is not None:
+            for literal in get_literals(action.precondition):
+                self.mark_relevant(literal, {**base_domains, **relevant_domains})
+
+    def update_axiom(self, axiom):
+        params = axiom.parameters[:axiom.num_external_parameters]
+        head = pddl.Atom(axiom.name, [par.name for par in params])
+        domains = self.get_variable_domains(
+            axiom.type_map, [par.name for par in axiom.parameters],
+            axiom.condition)
+        restricted = self.match(head, domains)
+        if restricted is not None:
+            domains.update(restricted)
+            for literal in get_literals(axiom.condition):
+                self.mark_relevant(literal, domains)
+
+    def run(self):
+        for literal in get_literals(self.task.goal):
+            self.mark_relevant(literal, {})
+        action_domains = {}
+        self.changed = True
+        while self.changed:
+            self.changed = False
+            for action in self.task.actions:
+                self.update_action(action, action_domains)
+            for axiom in self.task.axioms:
+                self.update_axiom(axiom)
+        return action_domains
+
+
+def compute_relevant_parameters(task, type_to_objects):
+    """Return a dict that maps each relevant action to the objects that
+    each variable of its action predicate (normalize.get_action_predicate)
+    can take in relevant instantiations: a list with a set of objects per
+    variable, or None for variables that can take any object of their
+    type. Actions that are not in the dict are irrelevant."""
+    analysis = RelevanceAnalysis(task, type_to_objects)
+    action_domains = analysis.run()
+    result = {}
+    for action, domains in action_domains.items():
+        result[action] = []
+        for var in normalize.get_action_predicate(action).args:
+            domain = domains[var]
+            if domain >= analysis.get_domain(action.type_map, var):
+                domain = None
+            result[action].append(domain)
+    return result
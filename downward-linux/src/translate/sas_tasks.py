@@ -1,5 +1,8 @@
+from array import array
 from typing import List, Tuple
 
+import spill
+
 SAS_FILE_VERSION = 3
 
 DEBUG = False
@@ -26,8 +29,11 @@ class SASTask:
         self.mutexes = mutexes
         self.init = init
         self.goal = goal
-        self.operators = sorted(operators, key=lambda op: (
-            op.name, op.prevail, op.pre_post))
+        if isinstance(operators, spill.SpillList):
+            operators.sort(key=get_operator_sort_key)
+            self.operators = operators
+        else:
+            self.operators = sorted(operators, key=get_operator_sort_key)
         self.axioms = sorted(axioms, key=lambda axiom: (
             axiom.condition, axiom.effect))
         self.metric = metric
@@ -117,6 +123,13 @@ class SASTask:
         return task_size
 
 
+def get_operator_sort_key(op):
+    # The same order as (op.name, op.prevail, op.pre_post), without decoding
+    # the arrays: the -1 that ends each effect condition in op._pre_post
+    # is smaller than any variable, as the end of a shorter list.
+    return (op.name, op._prevail, op._pre_post)
+
+
 class SASVariables:
     def __init__(self, ranges: List[int], axiom_layers: List[int],
                  value_names: List[List[str]]) -> None:
@@ -261,6 +274,16 @@ class SASGoal:
 
 
 class SASOperator:
+    # A task can have millions of operators. To save memory, prevail and
+    # pre_post are stored as flat arrays of ints:
+    #   prevail:  var, val, var, val, ...
+    #   pre_post: var, pre, post, cvar, cval, ..., -1, var, pre, post, ...
+    # The attributes of the same name decode them to lists of tuples (and
+    # encode what is assigned to them), so changing a list obtained from
+    # them does not change the operator. The arrays compare like the
+    # decoded lists, see get_operator_sort_key.
+    __slots__ = ["name", "_prevail", "_pre_post", "cost"]
+
     def __init__(self, name: str, prevail: List[VarValPair], pre_post:
             List[Tuple[int, int, int, List[VarValPair]]], cost: int) -> None:
         self.name = name
@@ -268,6 +291,47 @@ class SASOperator:
         self.pre_post = self._canonical_pre_post(pre_post)
         self.cost = cost
 
+    @property
+    def prevail(self):
+        values = self._prevail
+        return list(zip(values[::2], values[1::2]))
+
+    @prevail.setter
+    def prevail(self, prevail):
+        values = array("i")
+        for var, val in prevail:
+            values.append(var)
+            values.append(val)
+        self._prevail = values
+
+    @property
+    def pre_post(self):
+        values = self._pre_post
+        result = []
+        pos = 0
+        end = len(values)
+        while pos < end:
+            var, pre, post = values[pos:pos + 3]
+            pos += 3
+            cond = []
+            while values[pos] != -1:
+                cond.append((values[pos], values[pos + 1]))
+                pos += 2
+            pos += 1
+            result.append((var, pre, post, cond))
+        return result
+
+    @pre_post.setter
+    def pre_post(self, pre_post):
+        values = array("i")
+        for var, pre, post, cond in pre_post:
+            values.extend((var, pre, post))
+            for cvar, cval in cond:
+                values.append(cvar)
+                values.append(cval)
+            values.append(-1)
+        self._pre_post = values
+
     def _canonical_pre_post(self, pre_post):
         # Return a sorted and uniquified version of pre_post. We would
         # like to just use sorted(set(pre_post)), but this fails because
@@ -296,18 +296,23 @@ class VarValueRenaming:
             raise TriviallySolvable
 
     def apply_to_operators(self, operators):
-        new_operators = []
         num_removed = 0
-        for op in operators:
-            new_op = self.translate_operator(op)
-            if new_op is None:
-                num_removed += 1
-                if DEBUG:
-                    print("Removed operator: %s" % op.name)
-            else:
-                new_operators.append(new_op)
+
+        # A generator, so that operators that are spilled to disk
+        # (spill.SpillList) are translated one chunk at a time.
+        def translate_operators():
+            nonlocal num_removed
+            for op in operators:
+                new_op = self.translate_operator(op)
+                if new_op is None:
+                    num_removed += 1
+                    if DEBUG:
+                        print("Removed operator: %s" % op.name)
+                else:
+                    yield new_op
+
+        operators[:] = translate_operators()
         print("%d operators removed" % num_removed)
-        operators[:] = new_operators
 
     def apply_to_axioms(self, axioms):
         new_axioms = []
@@ -0,0 +1,100 @@
+"""Disk-backed lists for the operators of a task with --streaming-output.
+
+A SpillList keeps at most one chunk of its items in memory and pickles
+the rest to an anonymous temporary file, so a pass over the operators of
+a large task (translating, simplifying, reordering, writing) only needs
+memory for one chunk at a time. It supports what the translator does
+with its operator list: appending, iterating, len, replacing all items
+with operators[:] = new_items and sorting."""
+
+import heapq
+import pickle
+import tempfile
+
+# Number of items pickled together. Larger chunks are faster to read and
+# write but need more memory.
+CHUNK_SIZE = 1000
+
+# Number of items sorted in memory at a time by SpillList.sort. The sorted
+# runs are written in smaller chunks so that merging them only keeps a few
+# items of each run in memory.
+RUN_SIZE = 20000
+RUN_CHUNK_SIZE = 50
+
+
+class SpillList:
+    def __init__(self, items=(), chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._file = tempfile.TemporaryFile()
+        self._num_spilled = 0
+        self._buffer = []
+        self.extend(items)
+
+    def __len__(self):
+        return self._num_spilled + len(self._buffer)
+
+    def append(self, item):
+        self._buffer.append(item)
+        if len(self._buffer) >= self.chunk_size:
+            self._spill()
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def _spill(self):
+        if self._buffer:
+            self._file.seek(0, 2)
+            pickle.dump(self._buffer, self._file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            self._num_spilled += len(self._buffer)
+            self._buffer = []
+
+    def __iter__(self):
+        self._spill()
+        return self._iter_spilled(self._file, self._num_spilled)
+
+    @staticmethod
+    def _iter_spilled(spill_file, num_items):
+        # Every iterator keeps its own file position, so that several
+        # iterations (and appends) can be interleaved.
+        position = 0
+        while num_items:
+            spill_file.seek(position)
+            chunk = pickle.load(spill_file)
+            position = spill_file.tell()
+            num_items -= len(chunk)
+            yield from chunk
+
+    def __setitem__(self, index, items):
+        """Replace all items, as in list[:] = items. items may be computed
+        lazily from the old items of this list."""
+        if index != slice(None):
+            raise TypeError("SpillList only supports replacing all items")
+        replacement = SpillList(items, self.chunk_size)
+        replacement._spill()
+        self._file.close()
+        self._file = replacement._file
+        self._num_spilled = replacement._num_spilled
+        self._buffer = []
+
+    def sort(self, key):
+        """Sort stably by key with an external merge sort."""
+        runs = []
+        run = []
+        for item in self:
+            run.append(item)
+            if len(run) >= RUN_SIZE:
+                runs.append(self._make_run(run, key))
+                run = []
+        if runs:
+            runs.append(self._make_run(run, key))
+            self[:] = heapq.merge(*runs, key=key)
+        else:
+            run.sort(key=key)
+            self[:] = run
+
+    @staticmethod
+    def _make_run(items, key):
+        items.sort(key=key)
+        return SpillList(items, RUN_CHUNK_SIZE)
@@ -5,6 +5,7 @@
 from pddl_to_prolog import Rule, get_variables
 import graph
 import greedy_join
+import options
 import pddl
 
 def get_connected_conditions(conditions):
@@ -65,4 +66,7 @@ def split_into_binary_rules(rule, name_generator):
     if len(rule.conditions) <= 1:
         rule.type = "project"
         return [rule]
+    if options.multiway_joins and len(rule.conditions) >= 3:
+        rule.type = "multijoin"
+        return [rule]
     return greedy_join.greedy_join(rule, name_generator)
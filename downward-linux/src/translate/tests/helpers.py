@@ -0,0 +1,52 @@
+"""Helpers shared by the translator tests."""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+
+import normalize
+import pddl_parser
+import translate
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+TRANSLATE = os.path.join(os.path.dirname(DIR), "translate.py")
+BENCHMARKS = os.path.abspath(
+    os.path.join(DIR, "..", "..", "..", "misc", "tests", "benchmarks"))
+
+
+def benchmark(domain_name, task_name):
+    """Return the domain and task file of a task in misc/tests/benchmarks."""
+    return (os.path.join(BENCHMARKS, domain_name, "domain.pddl"),
+            os.path.join(BENCHMARKS, domain_name, task_name))
+
+
+def translate_to_string(domain, task, **kwargs):
+    """Translate in this process and return the SAS output."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        sas_task = translate.translate_files(domain, task, **kwargs)
+    output = io.StringIO()
+    sas_task.output(output)
+    return output.getvalue()
+
+
+def translate_with_cli(tmp_path, domain, task, *options, env=None):
+    """Translate in a new process with translate.py and return the SAS
+    output and what the translator printed."""
+    sas_file = tmp_path / "output.sas"
+    result = subprocess.run(
+        [sys.executable, TRANSLATE, domain, task, "--sas-file",
+         str(sas_file), *options],
+        check=True, stdout=subprocess.PIPE, universal_newlines=True,
+        env=env)
+    return sas_file.read_text(), result.stdout
+
+
+def open_task(domain, task):
+    """Parse and normalize a task."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        parsed_task = pddl_parser.open(
+            domain_filename=domain, task_filename=task)
+        normalize.normalize(parsed_task)
+    return parsed_task
@@ -0,0 +1,146 @@
+import contextlib
+import io
+
+import pytest
+
+import build_model
+import options
+import pddl
+import pddl_to_prolog
+
+from .helpers import benchmark, open_task
+
+TASKS = [("gripper", "prob01.pddl"), ("miconic-simpleadl", "s1-0.pddl"),
+         ("philosophers", "p01-phil2.pddl")]
+
+
+def make_program(facts, rules):
+    prog = pddl_to_prolog.PrologProgram()
+    for predicate, args in facts:
+        prog.add_fact(pddl.Atom(predicate, args))
+    for rule_type, conditions, effect in rules:
+        rule = pddl_to_prolog.Rule(
+            [pddl.Atom(predicate, args) for predicate, args in conditions],
+            pddl.Atom(*effect))
+        rule.type = rule_type
+        prog.add_rule(rule)
+    return prog
+
+
+def test_join_on_projected_variables():
+    facts = [("p", ["a", "x"]), ("p", ["b", "y"]), ("q", ["z"]),
+             ("s", ["x", "c"]), ("s", ["y", "d"])]
+    rules = [
+        # The conditions only share ?z, which is projected away, so every
+        # p fact is joined with every q and s fact (the empty join key).
+        ("join", [("p", ["?a", "?z"]), ("q", ["?z"])], ("r", ["?a"])),
+        ("join", [("p", ["?a", "?z"]), ("s", ["?z", "?c"])],
+         ("t", ["?a", "?c"])),
+        # Here ?z is part of the effect and the key of the join.
+        ("join", [("p", ["?a", "?z"]), ("s", ["?z", "?c"])],
+         ("u", ["?a", "?z", "?c"])),
+    ]
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = build_model.compute_model(make_program(facts, rules))
+    expected = facts + [
+        ("r", ["a"]), ("r", ["b"]),
+        ("t", ["a", "c"]), ("t", ["a", "d"]),
+        ("t", ["b", "c"]), ("t", ["b", "d"]),
+        ("u", ["a", "x", "c"]), ("u", ["b", "y", "d"])]
+    assert all(isinstance(atom, pddl.Atom) for atom in model)
+    assert sorted(model) == sorted(pddl.Atom(*fact) for fact in expected)
+
+
+@pytest.mark.parametrize("ground_fact", [True, False])
+def test_product_with_ground_conditions(ground_fact):
+    facts = [("p", ["a"]), ("p", ["b"]), ("q", ["a", "b"]), ("q", ["c", "c"]),
+             ("h", ["c"])]
+    if ground_fact:
+        facts.append(("g", []))
+    rules = [("product",
+              [("g", []), ("p", ["?x"]), ("h", ["c"]), ("q", ["?y", "?z"])],
+              ("e", ["?x", "?y", "?z"]))]
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = build_model.compute_model(make_program(facts, rules))
+    # The ground conditions bind nothing, but the rule only fires once
+    # all of them hold.
+    expected = list(facts)
+    if ground_fact:
+        expected += [("e", [x, y, z]) for x in ["a", "b"]
+                     for y, z in [("a", "b"), ("c", "c")]]
+    assert sorted(model) == sorted(pddl.Atom(*fact) for fact in expected)
+
+
+@pytest.fixture
+def reset_options():
+    yield
+    options.configure()
+
+
+def compute_model(task, **kwargs):
+    options.configure(**kwargs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return build_model.compute_model(pddl_to_prolog.translate(task))
+
+
+@pytest.mark.parametrize("domain_name, task_name", TASKS)
+def test_profile_model(domain_name, task_name, reset_options):
+    task = open_task(*benchmark(domain_name, task_name))
+    assert compute_model(task, profile_model=True) == compute_model(task)
+
+
+def read_rule_statistics(log):
+    """Return the fires, pushes and duplicates that --profile-model
+    reports for each rule."""
+    lines = log.split("Model computation by rule:\n")[1].splitlines()[1:]
+    result = {}
+    for line in lines:
+        fires, pushes, duplicates, _, rule = line.split(None, 4)
+        result[rule] = (int(fires), int(pushes), int(duplicates))
+    return result
+
+
+def test_profile_model_statistics(capsys, reset_options):
+    facts = [("p", ["a"]), ("p", ["b"]), ("q", ["a"]), ("q", ["c"])]
+    rules = [("project", [("p", ["?x"])], ("r", ["?x"])),
+             ("project", [("q", ["?x"])], ("r", ["?x"])),
+             ("join", [("p", ["?x"]), ("q", ["?x"])], ("s", ["?x"]))]
+    options.configure(profile_model=True)
+    build_model.compute_model(make_program(facts, rules))
+    # The facts are processed in sorted order, so r(a) is derived from
+    # p(a) before q(a) derives it again.
+    assert read_rule_statistics(capsys.readouterr().out) == {
+        "Atom r(0) :- Atom p(0)": (2, 2, 0),
+        "Atom r(0) :- Atom q(0)": (2, 2, 1),
+        "Atom s(0) :- Atom p(0), Atom q(0)": (4, 1, 0),
+    }
+
+
+@pytest.mark.parametrize("domain_name, task_name", TASKS)
+def test_profile_model_totals(domain_name, task_name, capsys, reset_options):
+    task = open_task(*benchmark(domain_name, task_name))
+    options.configure(profile_model=True)
+    prog = pddl_to_prolog.translate(task)
+    num_facts = len(prog.facts)
+    model = build_model.compute_model(prog)
+    log = capsys.readouterr().out
+    statistics = read_rule_statistics(log).values()
+    # Every push and every new atom after the initial facts is counted
+    # for exactly one rule.
+    total_pushes = int(log.split(" total queue pushes")[0].split()[-1])
+    assert sum(pushes for _, pushes, _ in statistics) == total_pushes - num_facts
+    assert (sum(pushes - duplicates for _, pushes, duplicates in statistics) ==
+            len(model) - num_facts)
+
+
+def relevant_atoms(model):
+    return {atom for atom in model
+            if not (isinstance(atom.predicate, str) and "$" in atom.predicate)}
+
+
+@pytest.mark.parametrize("domain_name, task_name", TASKS)
+def test_multiway_joins(domain_name, task_name, reset_options):
+    task = open_task(*benchmark(domain_name, task_name))
+    # Only the auxiliary atoms of the split rules may differ.
+    assert (relevant_atoms(compute_model(task, multiway_joins=True)) ==
+            relevant_atoms(compute_model(task)))
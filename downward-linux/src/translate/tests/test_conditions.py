@@ -0,0 +1,25 @@
+import pddl
+
+from .helpers import benchmark, translate_to_string
+
+
+def test_intern_literals():
+    atom = pddl.Atom.intern("at", ["a", "b"])
+    try:
+        assert pddl.Atom.intern("at", ("a", "b")) is atom
+        assert atom == pddl.Atom("at", ["a", "b"])
+        assert hash(atom) == hash(pddl.Atom("at", ["a", "b"]))
+        negated = pddl.NegatedAtom.intern("at", ["a", "b"])
+        assert negated is not atom
+        assert negated == atom.negate()
+    finally:
+        pddl.conditions.clear_interned_literals()
+    assert pddl.Atom.intern("at", ["a", "b"]) is not atom
+    pddl.conditions.clear_interned_literals()
+
+
+def test_translate_clears_interned_literals():
+    domain, task = benchmark("miconic-simpleadl", "s1-0.pddl")
+    output = translate_to_string(domain, task)
+    assert not pddl.conditions._interned_literals
+    assert translate_to_string(domain, task) == output
@@ -0,0 +1,13 @@
+import os
+
+from .helpers import benchmark, translate_to_string
+
+
+def test_domain_cache(tmp_path):
+    domain, task = benchmark("philosophers", "p01-phil2.pddl")
+    expected = translate_to_string(domain, task)
+    cache_dir = str(tmp_path / "cache")
+    # The first run fills the cache, the second one reads from it.
+    assert translate_to_string(domain, task, domain_cache=cache_dir) == expected
+    assert os.listdir(cache_dir)
+    assert translate_to_string(domain, task, domain_cache=cache_dir) == expected
@@ -0,0 +1,47 @@
+import contextlib
+import io
+
+import pytest
+
+import fact_groups
+import instantiate
+import invariant_finder
+import pddl
+
+from .helpers import benchmark, open_task
+
+
+def expand_group_naively(group, task, reachable_facts):
+    # The expansion before the index: try every object at the counted
+    # position.
+    result = []
+    for fact in group:
+        try:
+            pos = list(fact.args).index("?X")
+        except ValueError:
+            if fact in reachable_facts:
+                result.append(fact)
+        else:
+            for obj in task.objects:
+                newargs = list(fact.args)
+                newargs[pos] = obj.name
+                atom = pddl.Atom(fact.predicate, newargs)
+                if atom in reachable_facts:
+                    result.append(atom)
+    return result
+
+
+@pytest.mark.parametrize("domain_name, task_name", [
+    ("gripper", "prob01.pddl"), ("miconic-simpleadl", "s1-0.pddl"),
+    ("philosophers", "p01-phil2.pddl")])
+def test_instantiate_groups(domain_name, task_name):
+    task = open_task(*benchmark(domain_name, task_name))
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, atoms, _, _, _, reachable_action_params = instantiate.explore(task)
+        groups = invariant_finder.get_groups(task, reachable_action_params)
+    try:
+        assert groups
+        assert fact_groups.instantiate_groups(groups, task, atoms) == [
+            expand_group_naively(group, task, atoms) for group in groups]
+    finally:
+        pddl.conditions.clear_interned_literals()
@@ -0,0 +1,48 @@
+import contextlib
+import io
+
+import pytest
+
+import instantiate
+import options
+import pddl
+
+from .helpers import benchmark, open_task, translate_to_string
+
+
+@pytest.mark.parametrize("domain_name, task_name", [
+    ("gripper", "prob01.pddl"), ("philosophers", "p01-phil2.pddl")])
+def test_instantiate_jobs(domain_name, task_name, monkeypatch):
+    # Small chunks, so that the actions are spread over several workers
+    # and the chunks have to be put back in order.
+    monkeypatch.setattr(instantiate, "CHUNK_SIZE", 5)
+    domain, task = benchmark(domain_name, task_name)
+    assert (translate_to_string(domain, task, instantiate_jobs=2) ==
+            translate_to_string(domain, task))
+
+
+def test_instantiate_jobs_interns_literals(monkeypatch):
+    monkeypatch.setattr(instantiate, "CHUNK_SIZE", 5)
+    task = open_task(*benchmark("gripper", "prob01.pddl"))
+    options.configure(instantiate_jobs=2)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, fluent_facts, actions, _, _, _ = instantiate.explore(task)
+        # The literals of actions instantiated in the workers are replaced
+        # by the interned ones, which the fluent facts also use.
+        literals = []
+        for action in actions:
+            literals += action.precondition
+            for conditions, effect in action.add_effects + action.del_effects:
+                literals += conditions
+                literals.append(effect)
+        assert literals
+        for literal in literals:
+            assert literal.__class__.intern(
+                literal.predicate, literal.args) is literal
+        by_value = {literal: literal for literal in fluent_facts}
+        assert all(by_value[literal] is literal for literal in literals
+                   if literal in by_value)
+    finally:
+        options.configure()
+        pddl.conditions.clear_interned_literals()
@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from pddl_parser.lisp_parser import parse_nested_list
+from pddl_parser.parse_error import ParseError
+
+
+# The line-by-line parser that parse_nested_list replaced. Both must
+# produce the same lists and the same errors.
+def reference_parse_nested_list(input_file):
+    tokens = reference_tokenize(input_file)
+    next_token = next(tokens)
+    if next_token != "(":
+        raise ParseError(f"Expected '(', got '{next_token}'.")
+    result = list(reference_parse_list_aux(tokens))
+    remaining_tokens = list(tokens)
+    if remaining_tokens:
+        raise ParseError(f"Tokens remaining after parsing: "
+                         f"{' '.join(remaining_tokens)}")
+    return result
+
+def reference_tokenize(input):
+    for line in input:
+        line = line.split(";", 1)[0]  # Strip comments.
+        try:
+            line.encode("ascii")
+        except UnicodeEncodeError:
+            raise ParseError(f"Non-ASCII character outside comment: {line[0:-1]}")
+        line = line.replace("(", " ( ").replace(")", " ) ").replace("?", " ?")
+        for token in line.split():
+            yield token.lower()
+
+def reference_parse_list_aux(tokenstream):
+    # Leading "(" has already been swallowed.
+    while True:
+        try:
+            token = next(tokenstream)
+        except StopIteration:
+            raise ParseError("Missing ')'")
+        if token == ")":
+            return
+        elif token == "(":
+            yield list(reference_parse_list_aux(tokenstream))
+        else:
+            yield token
+
+
+def parse(parser, text):
+    try:
+        return parser(io.StringIO(text))
+    except ParseError as err:
+        return ParseError, str(err)
+
+
+CASES = [
+    "(define (domain d) (:predicates (p ?x?y)))\n",
+    "(define (Domain D)\n  (:Predicates (P ?X)))\n; comment at the end",
+    "(define (domain d)) ; comment at the end without newline",
+    "(define (domain d;comment) (x))\n)\n",
+    "(define (domain d) (:predicates (p;q ?x)\n))\n",
+    "(define (domain d)\n  (:predicates (p ?x))\n",
+    "(define (domain d)",
+    "(define (domain d)))\n",
+    "(define (domain d)) (extra tokens)\n",
+    "domain d)\n",
+    "(define (domain d) ; kommentar äöü\n (p))\n",
+    "(define (domain d)\n (p ä))\n",
+    "(define (domain d) (p ä))",
+    "domain ä\n",
+    "domain\n(ä)\n",
+    "(define (domain d)\r\n  (:predicates (p ?x)) ; comment\r\n)\r\n",
+    "(define (domain d)\r\n (p ä))\r\n",
+]
+
+
+@pytest.mark.parametrize("text", CASES)
+def test_parse_nested_list(text):
+    assert (parse(parse_nested_list, text) ==
+            parse(reference_parse_nested_list, text))
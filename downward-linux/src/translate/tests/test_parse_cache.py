@@ -0,0 +1,57 @@
+import os
+import shutil
+
+from .helpers import benchmark, translate_to_string, translate_with_cli
+
+LOADED = "Loaded task from parse cache"
+
+
+def translate_in_new_process(tmp_path, domain, task, cache_dir, hash_seed):
+    # Different hash seeds, so that hashes computed before pickling a task
+    # would be wrong after loading it in the other process.
+    env = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+    return translate_with_cli(
+        tmp_path, domain, task, "--parse-cache", cache_dir, env=env)
+
+
+def test_parse_cache(tmp_path):
+    domain, task = benchmark("miconic-simpleadl", "s1-0.pddl")
+    cache_dir = str(tmp_path / "cache")
+    expected = translate_to_string(domain, task)
+
+    output, log = translate_in_new_process(tmp_path, domain, task, cache_dir, 1)
+    assert LOADED not in log
+    assert output == expected
+    assert os.listdir(cache_dir)
+    output, log = translate_in_new_process(tmp_path, domain, task, cache_dir, 2)
+    assert LOADED in log
+    assert output == expected
+    assert translate_to_string(domain, task, parse_cache=cache_dir) == expected
+
+
+def test_parse_cache_invalidation(tmp_path):
+    benchmark_domain, benchmark_task = benchmark("gripper", "prob01.pddl")
+    domain = tmp_path / "domain.pddl"
+    task = tmp_path / "task.pddl"
+    shutil.copy(benchmark_domain, domain)
+    shutil.copy(benchmark_task, task)
+    domain, task = str(domain), str(task)
+    cache_dir = str(tmp_path / "cache")
+    translate_in_new_process(tmp_path, domain, task, cache_dir, 1)
+
+    for filename, old, new in [(task, "(at ball4 roomb)", "(at ball4 rooma)"),
+                               (domain, "(:action move", "(:action walk")]:
+        with open(filename) as pddl_file:
+            text = pddl_file.read()
+        assert old in text
+        with open(filename, "w") as pddl_file:
+            pddl_file.write(text.replace(old, new))
+        expected = translate_to_string(domain, task)
+        output, log = translate_in_new_process(
+            tmp_path, domain, task, cache_dir, 1)
+        assert LOADED not in log
+        assert output == expected
+        output, log = translate_in_new_process(
+            tmp_path, domain, task, cache_dir, 2)
+        assert LOADED in log
+        assert output == expected
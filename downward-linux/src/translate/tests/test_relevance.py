@@ -0,0 +1,57 @@
+import contextlib
+import io
+
+import instantiate
+import options
+
+from .helpers import open_task, translate_to_string
+
+DOMAIN = """
+(define (domain carry)
+  (:requirements :strips :typing)
+  (:types package location)
+  (:predicates (at ?p - package ?l - location)
+               (road ?from ?to - location)
+               (painted ?p - package))
+  (:action carry
+    :parameters (?p - package ?from ?to - location)
+    :precondition (and (at ?p ?from) (road ?from ?to))
+    :effect (and (not (at ?p ?from)) (at ?p ?to)))
+  (:action paint
+    :parameters (?p - package)
+    :precondition (at ?p l1)
+    :effect (painted ?p)))
+"""
+
+TASK = """
+(define (problem carry-1) (:domain carry)
+  (:objects p1 p2 - package l1 l2 l3 - location)
+  (:init (at p1 l1) (at p2 l1) (road l1 l2) (road l2 l3))
+  (:goal (at p1 l3)))
+"""
+
+
+def explore_action_names(domain, task, **kwargs):
+    options.configure(**kwargs)
+    try:
+        parsed_task = open_task(domain, task)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, _, actions, _, _, _ = instantiate.explore(parsed_task)
+    finally:
+        options.configure()
+    return {action.name for action in actions}
+
+
+def test_relevance_analysis(tmp_path):
+    domain = tmp_path / "domain.pddl"
+    task = tmp_path / "task.pddl"
+    domain.write_text(DOMAIN)
+    task.write_text(TASK)
+    domain, task = str(domain), str(task)
+
+    # Painting and moving p2 cannot help to reach the goal.
+    assert explore_action_names(domain, task, relevance_analysis=True) == {
+        "(carry p1 l1 l2)", "(carry p1 l2 l3)"}
+    assert "(paint p2)" in explore_action_names(domain, task)
+    assert (translate_to_string(domain, task, relevance_analysis=True) ==
+            translate_to_string(domain, task))
@@ -0,0 +1,44 @@
+import pickle
+import random
+
+import sas_tasks
+
+
+def random_operator(rng, name):
+    prevail = [(var, rng.randrange(3)) for var in rng.sample(range(6), 2)]
+    pre_post = []
+    for _ in range(rng.randrange(1, 4)):
+        cond = [(var, rng.randrange(2))
+                for var in rng.sample(range(6, 9), rng.randrange(3))]
+        pre_post.append((rng.randrange(3), rng.randrange(-1, 2),
+                         rng.randrange(2), cond))
+    return sas_tasks.SASOperator(name, prevail, pre_post, rng.randrange(5))
+
+
+def test_operator_arrays():
+    prevail = [(3, 1), (1, 0)]
+    pre_post = [(2, -1, 1, [(5, 0), (4, 1)]), (0, 1, 0, []),
+                (2, -1, 1, [(5, 0), (4, 1)])]
+    op = sas_tasks.SASOperator("(op)", prevail, pre_post, 1)
+    # Sorted and without duplicates, as before the arrays.
+    assert op.prevail == [(1, 0), (3, 1)]
+    assert op.pre_post == [(0, 1, 0, []), (2, -1, 1, [(5, 0), (4, 1)])]
+    # The decoded lists are copies.
+    op.pre_post[0][3].append((7, 0))
+    assert op.pre_post[0] == (0, 1, 0, [])
+
+    rng = random.Random(0)
+    for _ in range(100):
+        op = random_operator(rng, "(op)")
+        copy = pickle.loads(pickle.dumps(op))
+        assert (copy.name, copy.prevail, copy.pre_post, copy.cost) == (
+            op.name, op.prevail, op.pre_post, op.cost)
+
+
+def test_operator_sort_key():
+    rng = random.Random(0)
+    operators = [random_operator(rng, "(op%d)" % rng.randrange(3))
+                 for _ in range(500)]
+    assert (sorted(operators, key=sas_tasks.get_operator_sort_key) ==
+            sorted(operators,
+                   key=lambda op: (op.name, op.prevail, op.pre_post)))
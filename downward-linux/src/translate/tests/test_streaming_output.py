@@ -0,0 +1,27 @@
+import random
+
+import spill
+
+from .helpers import benchmark, translate_to_string
+
+
+def test_streaming_output():
+    for domain_name, task_name in [("miconic-simpleadl", "s1-0.pddl"),
+                                   ("philosophers", "p01-phil2.pddl")]:
+        domain, task = benchmark(domain_name, task_name)
+        assert (translate_to_string(domain, task, streaming_output=True) ==
+                translate_to_string(domain, task))
+
+
+def test_spill_list_sort(monkeypatch):
+    monkeypatch.setattr(spill, "RUN_SIZE", 100)
+    rng = random.Random(0)
+    items = [(rng.randrange(50), index) for index in range(1000)]
+    spill_list = spill.SpillList(items, chunk_size=30)
+    assert len(spill_list) == 1000
+    spill_list.sort(key=lambda item: item[0])
+    # The sort is stable, as sorted().
+    assert list(spill_list) == sorted(items, key=lambda item: item[0])
+    spill_list[:] = (item for item in spill_list if item[0] % 2)
+    assert list(spill_list) == sorted(
+        (item for item in items if item[0] % 2), key=lambda item: item[0])
@@ -0,0 +1,36 @@
+import pytest
+
+import translate
+
+from .helpers import benchmark, translate_to_string, translate_with_cli
+
+
+def test_translate_files_resets_options(tmp_path):
+    domain, task = benchmark("miconic-simpleadl", "s1-0.pddl")
+    default, _ = translate_with_cli(tmp_path, domain, task)
+    full_encoding, _ = translate_with_cli(
+        tmp_path, domain, task, "--full-encoding")
+    # Options of one call must not leak into the next one.
+    assert translate_to_string(domain, task) == default
+    assert translate_to_string(
+        domain, task, use_partial_encoding=False) == full_encoding
+    assert translate_to_string(domain, task) == default
+
+
+def test_translate_files_raises_input_error(tmp_path):
+    domain = tmp_path / "domain.pddl"
+    task = tmp_path / "task.pddl"
+    domain.write_text("""
+(define (domain derived)
+  (:requirements :strips :derived-predicates)
+  (:predicates (p) (q))
+  (:derived (q) (p))
+  (:action make-p :parameters () :precondition () :effect (p)))
+""")
+    task.write_text("""
+(define (problem derived-1) (:domain derived)
+  (:init (q))
+  (:goal (p)))
+""")
+    with pytest.raises(translate.TranslateInputError, match="derived predicate"):
+        translate_to_string(str(domain), str(task))
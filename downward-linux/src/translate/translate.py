@@ -20,6 +20,7 @@ from copy import deepcopy
 from itertools import product
 
 import axiom_rules
+import domain_cache
 import fact_groups
 import instantiate
 import normalize
@@ -29,6 +30,7 @@ import pddl_parser
 import sas_tasks
 import signal
 import simplify
+import spill
 import timers
 import tools
 import variable_order
@@ -111,7 +113,7 @@ def translate_strips_conditions_aux(
             ## it would be nice to choose the behaviour as an option.
             done = False
             new_condition = {}
-            atom = pddl.Atom(fact.predicate, fact.args)  # force positive
+            atom = pddl.Atom.intern(fact.predicate, fact.args)  # force positive
             for var, val in dictionary[atom]:
                 poss_vals = set(range(ranges[var]))
                 poss_vals.remove(val)
@@ -396,7 +398,10 @@ def translate_strips_axiom(axiom, dictionary, ranges, mutex_dict, mutex_ranges):
 
 def translate_strips_operators(actions, strips_to_sas, ranges, mutex_dict,
                                mutex_ranges, implied_facts):
-    result = []
+    if options.streaming_output:
+        result = spill.SpillList()
+    else:
+        result = []
     for action in actions:
         sas_ops = translate_strips_operator(action, strips_to_sas, ranges,
                                             mutex_dict, mutex_ranges,
@@ -703,11 +708,34 @@ def dump_statistics(sas_task):
         print("Translator peak memory: %d KB" % peak_memory)
 
 
-def main():
-    timer = timers.Timer()
+def parse_task(domain_filename, task_filename):
+    if not options.parse_cache:
+        return pddl_parser.open(
+            domain_filename=domain_filename, task_filename=task_filename)
+    key = domain_cache.make_key(
+        "task", domain_cache.hash_file(domain_filename),
+        domain_cache.hash_file(task_filename))
+    task = domain_cache.load(options.parse_cache, key)
+    if task is not None:
+        print("Loaded task from parse cache")
+        return task
+    task = pddl_parser.open(
+        domain_filename=domain_filename, task_filename=task_filename)
+    # Store before normalization, which modifies the task.
+    domain_cache.store(options.parse_cache, key, task)
+    return task
+
+
+def translate_pddl_files(domain_filename, task_filename):
+    """Parse, normalize and translate a PDDL task with the current
+    options."""
+    global simplified_effect_condition_counter
+    global added_implied_precondition_counter
+    simplified_effect_condition_counter = 0
+    added_implied_precondition_counter = 0
+
     with timers.timing("Parsing", True):
-        task = pddl_parser.open(
-            domain_filename=options.domain, task_filename=options.task)
+        task = parse_task(domain_filename, task_filename)
 
     with timers.timing("Normalizing task"):
         normalize.normalize(task)
@@ -719,7 +747,41 @@ def main():
                 if effect.literal.negated:
                     del action.effects[index]
 
-    sas_task = pddl_to_sas(task)
+    try:
+        return pddl_to_sas(task)
+    finally:
+        pddl.conditions.clear_interned_literals()
+
+
+class TranslateInputError(Exception):
+    """Input that translate_files cannot translate, other than a PDDL
+    syntax error: an unreadable file or an unsupported feature such as
+    object fluents or a derived predicate in :init."""
+
+
+def translate_files(domain_filename, task_filename, **kwargs) -> sas_tasks.SASTask:
+    """Translate a PDDL task to a SAS task in the current process.
+
+    kwargs are option destinations as in options.py (e.g.
+    use_partial_encoding=False for --full-encoding); all other options
+    keep their defaults, whatever earlier calls or the command line set.
+    The domain, task and sas_file options are ignored, nothing is written.
+    Raises pddl_parser.ParseError on PDDL syntax errors and
+    TranslateInputError on other invalid input. It never raises
+    SystemExit."""
+    options.configure(**kwargs)
+    try:
+        return translate_pddl_files(domain_filename, task_filename)
+    except SystemExit as exit:
+        # Where the command-line translator exits with an error message
+        # (see normalize.verify_axiom_predicates, pddl.Function and
+        # pddl_parser.pddl_file), a library caller gets an exception.
+        raise TranslateInputError(str(exit.code)) from exit
+
+
+def main():
+    timer = timers.Timer()
+    sas_task = translate_pddl_files(options.domain, options.task)
     dump_statistics(sas_task)
 
     with timers.timing("Writing output"):
@@ -737,6 +799,7 @@ def handle_sigxcpu(signum, stackframe):
 
 
 if __name__ == "__main__":
+    options.setup()
     try:
         signal.signal(signal.SIGXCPU, handle_sigxcpu)
     except AttributeError:
@@ -5,20 +5,22 @@ PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 RAW_PDDL_DIR="$PROJECT_ROOT/data/raw_pddl"
 ANON_PDDL_DIR="$PROJECT_ROOT/data/anon_pddl"
 
-rm -rf "$RAW_PDDL_DIR"
-
-# grab raw PDDL domains from pyperplan
-mkdir -p "$RAW_PDDL_DIR"
+# anonymize.py skips unchanged domains/tasks via data/anon_pddl/manifest.json,
+# so only fetch raw PDDL if it isn't there yet (delete data/raw_pddl to refetch)
+if [ ! -d "$RAW_PDDL_DIR" ]; then
+    # grab raw PDDL domains from pyperplan
+    mkdir -p "$RAW_PDDL_DIR"
+    cd "$RAW_PDDL_DIR"
+    git clone --filter=blob:none --no-checkout https://github.com/aibasel/pyperplan.git temp_repo
+    cd temp_repo
+    git sparse-checkout init --cone
+    git sparse-checkout set benchmarks
+    git checkout
+    mv benchmarks/* "$RAW_PDDL_DIR/" 
+    cd "$RAW_PDDL_DIR"
+    rm -rf temp_repo
+fi
 mkdir -p "$ANON_PDDL_DIR"
-cd "$RAW_PDDL_DIR"
-git clone --filter=blob:none --no-checkout https://github.com/aibasel/pyperplan.git temp_repo
-cd temp_repo
-git sparse-checkout init --cone
-git sparse-checkout set benchmarks
-git checkout
-mv benchmarks/* "$RAW_PDDL_DIR/" 
-cd "$RAW_PDDL_DIR"
-rm -rf temp_repo
 
 # get rid of unparsable domains
 
@@ -42,6 +44,4 @@ for dir in "$RAW_PDDL_DIR"/*; do
 done
 
 # anonymize pddl
-for domain in "${KEEP_DIRS[@]}"; do 
-    python3 "$PROJECT_ROOT/src/anonymize.py" --verbose --domain "$domain"
-done
+python3 "$PROJECT_ROOT/src/anonymize.py" --verbose --all --jobs 0
@@ -1,22 +1,55 @@
 # Anonymize PDDL domains and problems
 
 import re 
+import copy
 import json
+import hashlib
+import heapq
+import random
 import argparse
 import os
-from pddl_parser.PDDL import PDDL_Parser
+import time
+import multiprocessing
+import fd_backend
+import canonical
+try:
+    from pddl_parser.PDDL import PDDL_Parser
+except ImportError:
+    # only needed by the default pucrs backend, --backend fd works without it
+    PDDL_Parser = None
+from collections import ChainMap
 from pathlib import Path 
 
 PROJ_DIR = Path(__file__).resolve().parent.parent
 RAW_DIR = PROJ_DIR / "data" / "raw_pddl"
 ANON_DIR = PROJ_DIR / "data" / "anon_pddl"
+EXPORT_DIR = PROJ_DIR / "data" / "export"
+
+# hash of the anonymizer sources, so any change to them invalidates the manifest
+ANONYMIZER_VERSION = hashlib.sha256(
+    Path(__file__).read_bytes() + Path(fd_backend.__file__).read_bytes()
+).hexdigest()[:16]
+
+BACKENDS = ["pucrs", "fd"]
 
 verbose = False
+backend = "pucrs"
+
+# per-process cache of DomainContext, keyed by (domain dir, domain file name)
+_domain_contexts = {}
+
+# per-process cache of domain symbol tables, keyed by (path, mtime)
+_domain_symbols = {}
 
 def log(args):
     if verbose:
         print(args)
 
+def init_worker(verbose_value: bool, backend_value: str):
+    global verbose, backend
+    verbose = verbose_value
+    backend = backend_value
+
 # ensure scoped naming
 def serialize_literals_scoped(literals, scoped_map):
     out = []
@@ -145,7 +178,61 @@ def emit_anonymous_task(anon_task_path: Path, parser: PDDL_Parser):
     with open(anon_task_path, "w") as f:
         f.write("\n".join(lines))
 
-def anonymize_domain(filename: str, domain_dir: Path):
+class DomainContext:
+    """
+    Parsed real domain, parsed anonymous domain and symbol table of one domain file
+    Built once and shared by every task anonymized against that domain
+    """
+    def __init__(self, real_parser: PDDL_Parser, anon_parser: PDDL_Parser, symbols: dict[str, str], anon_domain_path: Path):
+        self.real_parser = real_parser
+        self.anon_parser = anon_parser
+        self.symbols = symbols
+        self.flipped_symbols = {v: k for k, v in symbols.items()}
+        self.anon_domain_path = anon_domain_path
+
+    @classmethod
+    def load(cls, real_domain_path: Path, anon_domain_path: Path):
+        """
+        Rebuild context from an already anonymized domain on disk
+        """
+        symbols_path = anon_domain_path.parent / f"{anon_domain_path.stem}_symbols.json"
+        with open(symbols_path, "r") as f:
+            symbols = json.load(f)
+
+        real_parser = PDDL_Parser()
+        real_parser.parse_domain(real_domain_path)
+        anon_parser = PDDL_Parser()
+        anon_parser.parse_domain(anon_domain_path)
+
+        return cls(real_parser, anon_parser, symbols, anon_domain_path)
+
+    def problem_parser(self) -> PDDL_Parser:
+        """
+        Fresh parser initialized with the real domain, ready for parse_problem()
+        """
+        parser = copy.copy(self.real_parser)
+        # parse_problem() extends the domain constants in place
+        parser.objects = {typ: list(objs) for typ, objs in self.real_parser.objects.items()}
+        return parser
+
+def get_domain_context(domain_dir: Path, domain_file: Path):
+    """
+    Cached DomainContext (or fd_backend.FDDomain) for an anonymized domain,
+    loaded on first use
+    """
+    key = (domain_dir, domain_file.name)
+    if key not in _domain_contexts:
+        if backend == "fd":
+            # naming is deterministic, so redoing it in memory matches the files
+            domain = fd_backend.FDDomain(domain_file.resolve())
+            fd_backend.anonymize_domain(domain)
+            _domain_contexts[key] = domain
+        else:
+            anon_domain_path = ANON_DIR / domain_dir.name / domain_file.name
+            _domain_contexts[key] = DomainContext.load(domain_file.resolve(), anon_domain_path)
+    return _domain_contexts[key]
+
+def anonymize_domain(filename: str, domain_dir: Path) -> DomainContext:
     """
     Generate anonymized PDDL domain
     Creates new PDDL file + symbols.json with symbol mapping
@@ -159,6 +246,8 @@ def anonymize_domain(filename: str, domain_dir: Path):
     parser = PDDL_Parser()
 
     parser.parse_domain(domain_path)
+    # keep the real domain around, tasks are parsed against it
+    real_parser = copy.deepcopy(parser)
 
     symbols["planning_domain"] = parser.domain_name
     parser.domain_name = "planning_domain"
@@ -169,7 +258,8 @@ def anonymize_domain(filename: str, domain_dir: Path):
         type_names.update(children)
 
     type_map = {"object": "object"} # keep base
-    for i, name in enumerate(type_names):
+    # sort so numbering doesn't depend on set order (differs per process)
+    for i, name in enumerate(sorted(type_names)):
         if name != "object":
             # keep it backwards for looking when updating parser
             type_map[name] = f"type_{i}"
@@ -232,29 +322,23 @@ def anonymize_domain(filename: str, domain_dir: Path):
     log(symbols)
     log(f"\nAnonymized domain: {domain_path}")
 
-    return anon_domain_path
+    return DomainContext(real_parser, parser, symbols, anon_domain_path)
 
-def anonymize_task(filename: str, domain_dir: Path, real_domain_path: Path, anon_domain_path: Path):
+def anonymize_task(filename: str, domain_dir: Path, ctx: DomainContext):
     """
     Generate anonymized PDDL problem using anonymous domain
     """
     task_path = domain_dir / filename
     anon_task_path = ANON_DIR / domain_dir.name / filename
     symbols_path = ANON_DIR / domain_dir.name / f"{Path(filename).stem}_symbols.json"
-    domain_symbols_path = ANON_DIR / domain_dir.name / f"{anon_domain_path.stem}_symbols.json"
-
-    # start with domain symbols
-    with open(domain_symbols_path, "r") as f:
-        symbols = json.load(f)
-
-    flipped_symbols = {v: k for k, v in symbols.items()}
 
-    domain_parser = PDDL_Parser()
-    domain_parser.parse_domain(anon_domain_path)
+    # only task symbols are stored, the table extends the domain one
+    symbols = {}
+    flipped_symbols = ChainMap({}, ctx.flipped_symbols)
+    domain_parser = ctx.anon_parser
 
-    parser = PDDL_Parser()
     # grab raw domain so parser initializes correctly
-    parser.parse_domain(real_domain_path)
+    parser = ctx.problem_parser()
     parser.parse_problem(task_path)
 
     parser.requirements = domain_parser.requirements
@@ -299,26 +383,267 @@ def anonymize_task(filename: str, domain_dir: Path, real_domain_path: Path, anon
     anon_task_path.parent.mkdir(parents=True, exist_ok=True)
     emit_anonymous_task(anon_task_path, parser)
 
+    table = {"extends": f"{ctx.anon_domain_path.stem}_symbols.json", "symbols": symbols}
     with open(symbols_path, "w") as f:
-        json.dump(symbols, f, indent=2)
+        json.dump(table, f, indent=2)
 
     log(symbols)
     log(f"\nAnonymized task: {task_path}")
-    
 
-def anonymize_all():
+def anonymize_domain_fd(filename: str, domain_dir: Path) -> fd_backend.FDDomain:
+    """
+    Generate anonymized PDDL domain with the Fast Downward parser backend
+    Supports ADL domains (quantifiers, conditional effects, derived predicates)
+    """
+    domain_path = domain_dir / filename
+    anon_domain_path = ANON_DIR / domain_dir.name / filename
+    symbols_path = ANON_DIR / domain_dir.name / f"{Path(filename).stem}_symbols.json"
+
+    domain = fd_backend.FDDomain(domain_path)
+    anon_text = fd_backend.anonymize_domain(domain)
+
+    anon_domain_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(anon_domain_path, "w") as f:
+        f.write(anon_text)
+    with open(symbols_path, "w") as f:
+        json.dump(domain.symbols, f, indent=2)
+
+    log(domain.symbols)
+    log(f"\nAnonymized domain: {domain_path}")
+
+    return domain
+
+def anonymize_task_fd(filename: str, domain_dir: Path, domain: fd_backend.FDDomain, domain_file: Path):
+    """
+    Generate anonymized PDDL problem with the Fast Downward parser backend
+    """
+    task_path = domain_dir / filename
+    anon_task_path = ANON_DIR / domain_dir.name / filename
+    symbols_path = ANON_DIR / domain_dir.name / f"{Path(filename).stem}_symbols.json"
+
+    problem = fd_backend.FDProblem(domain, task_path)
+    anon_text, symbols = fd_backend.anonymize_problem(domain, problem)
+
+    anon_task_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(anon_task_path, "w") as f:
+        f.write(anon_text)
+    table = {"extends": f"{domain_file.stem}_symbols.json", "symbols": symbols}
+    with open(symbols_path, "w") as f:
+        json.dump(table, f, indent=2)
+
+    log(symbols)
+    log(f"\nAnonymized task: {task_path}")
+
+
+def find_domain_file(task_file: Path):
+    """
+    Find the domain file a task belongs to, or None
+    Same naming rules as fast-downward's driver.util.find_domain_filename,
+    with pyperplan's taskNN.pddl -> domainNN.pddl tried first
+    """
+    name = task_file.name
+    stem, ext = task_file.stem, task_file.suffix
+
+    candidates = []
+    if stem.startswith("task"):
+        candidates.append("domain" + stem[len("task"):] + ext)
+    candidates += [
+        "domain.pddl",
+        stem + "-domain" + ext,
+        name[:3] + "-domain.pddl",
+        "domain_" + name,
+        "domain-" + name,
+    ]
+
+    for candidate in candidates:
+        domain_file = task_file.parent / candidate
+        if domain_file.exists():
+            return domain_file
+    return None
+
+def domain_units(domain_dir: Path):
+    """
+    Split a domain directory into (domain_dir, domain_file) and
+    (domain_dir, domain_file, task_file) work units
+    Each task is paired with exactly one domain file
+    """
+    domain_files = sorted(domain_dir.glob("domain*.pddl"))
+    domains = [(domain_dir, domain_file) for domain_file in domain_files]
+
+    tasks = []
+    for task_file in sorted(domain_dir.glob("task*.pddl")):
+        domain_file = find_domain_file(task_file)
+        if domain_file is None:
+            print(f"No domain file found for {task_file}, skipping.")
+            continue
+        tasks.append((domain_dir, domain_file, task_file))
+
+    return domains, tasks
+
+def _anonymize_domain_unit(unit):
+    domain_dir, domain_file = unit
+    anonymize = anonymize_domain_fd if backend == "fd" else anonymize_domain
+    _domain_contexts[(domain_dir, domain_file.name)] = anonymize(domain_file.name, domain_dir)
+    return unit
+
+def _anonymize_task_unit(unit):
+    domain_dir, domain_file, task_file = unit
+    ctx = get_domain_context(domain_dir, domain_file)
+    if backend == "fd":
+        anonymize_task_fd(task_file.name, domain_dir, ctx, domain_file)
+    else:
+        anonymize_task(task_file.name, domain_dir, ctx)
+    return unit
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+def unit_key(unit) -> str:
+    # last file of a unit is the one being anonymized
+    return f"{unit[0].name}/{unit[-1].name}"
+
+def key_outputs(key: str) -> list[Path]:
+    dir_name, file_name = key.split("/")
+    out_dir = ANON_DIR / dir_name
+    return [out_dir / file_name, out_dir / f"{Path(file_name).stem}_symbols.json"]
+
+def unit_outputs(unit) -> list[Path]:
+    return key_outputs(unit_key(unit))
+
+def load_manifest() -> dict:
+    """
+    Manifest of input hashes per anonymized unit, empty if missing or written by
+    a different anonymizer version
+    """
+    try:
+        with open(ANON_DIR / "manifest.json", "r") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+
+    version = f"{ANONYMIZER_VERSION}/{backend}"
+    if manifest.get("anonymizer") != version:
+        manifest = {"anonymizer": version, "units": {}}
+    return manifest
+
+# units finished between two manifest writes, so an interrupted run only
+# redoes the last few
+MANIFEST_SAVE_EVERY = 100
+
+def save_manifest(manifest: dict):
+    manifest_path = ANON_DIR / "manifest.json"
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def prune_manifest(manifest: dict, keys: set, dir_names=None) -> int:
+    """
+    Drop manifest entries whose source file is gone, and delete their outputs
+    Only entries in dir_names are considered, all of them if None
+    """
+    removed = 0
+    for key in list(manifest["units"]):
+        if key in keys or (dir_names is not None and key.split("/")[0] not in dir_names):
+            continue
+        for path in key_outputs(key):
+            path.unlink(missing_ok=True)
+        del manifest["units"][key]
+        log(f"Removed outputs of deleted source: {key}")
+        removed += 1
+    return removed
+
+def run_units(domains: list, tasks: list, jobs: int = 1, force: bool = False, dir_names=None):
+    """
+    Anonymize domain units, then task units, optionally over a process pool
+    Domains have to be finished first, since tasks read their symbol tables
+    Units whose inputs are unchanged since the last run are skipped unless forced
+    The manifest is written as units finish, so an interrupted run keeps its
+    progress; entries (and outputs) of sources that are gone are dropped,
+    within dir_names if given
+    """
+    start = time.perf_counter()
+
+    manifest = load_manifest()
+    hashes = {}
+    def unit_inputs(unit):
+        inputs = {}
+        # task units also depend on their domain file
+        for path in unit[1:]:
+            if path not in hashes:
+                hashes[path] = file_hash(path)
+            inputs[f"{unit[0].name}/{path.name}"] = hashes[path]
+        return inputs
+
+    def is_stale(unit):
+        entry = manifest["units"].get(unit_key(unit))
+        return (force or entry is None
+                or entry["inputs"] != unit_inputs(unit)
+                or not all(path.exists() for path in unit_outputs(unit)))
+
+    removed = prune_manifest(manifest, {unit_key(unit) for unit in domains + tasks}, dir_names)
+    stale_domains = [unit for unit in domains if is_stale(unit)]
+    stale_tasks = [unit for unit in tasks if is_stale(unit)]
+
+    finished = 0
+    def record(unit):
+        nonlocal finished
+        manifest["units"][unit_key(unit)] = {"inputs": unit_inputs(unit)}
+        finished += 1
+        if finished % MANIFEST_SAVE_EVERY == 0:
+            save_manifest(manifest)
+
+    # a stale unit's old entry must not survive a crash that leaves its
+    # outputs half-written
+    for unit in stale_domains + stale_tasks:
+        manifest["units"].pop(unit_key(unit), None)
+    if removed or stale_domains or stale_tasks:
+        save_manifest(manifest)
+
+    try:
+        if jobs > 1:
+            chunksize = max(1, len(stale_tasks) // (jobs * 4))
+            with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(verbose, backend)) as pool:
+                for unit in pool.imap_unordered(_anonymize_domain_unit, stale_domains):
+                    record(unit)
+                for unit in pool.imap_unordered(_anonymize_task_unit, stale_tasks, chunksize=chunksize):
+                    record(unit)
+        else:
+            for unit in stale_domains:
+                record(_anonymize_domain_unit(unit))
+            for unit in stale_tasks:
+                record(_anonymize_task_unit(unit))
+    finally:
+        save_manifest(manifest)
+
+    elapsed = time.perf_counter() - start
+    rate = len(stale_tasks) / elapsed if elapsed > 0 else 0.0
+    skipped = len(domains) + len(tasks) - len(stale_domains) - len(stale_tasks)
+    print(f"Anonymized {len(stale_domains)} domains and {len(stale_tasks)} tasks "
+          f"in {elapsed:.2f}s ({rate:.1f} tasks/sec), {skipped} up to date, "
+          f"{removed} removed")
+
+def anonymize_all(jobs: int = 1, force: bool = False):
     """
     Anonymize all .pddl in data/raw_pddl, and save to data/anon_pddl
     """
     try:
-        for domain_dir in RAW_DIR.iterdir():
-            anonymize_directory(str(domain_dir.resolve()))
+        domains, tasks = [], []
+        for domain_dir in sorted(RAW_DIR.iterdir()):
+            if not domain_dir.is_dir():
+                continue
+            dir_domains, dir_tasks = domain_units(domain_dir.resolve())
+            domains += dir_domains
+            tasks += dir_tasks
+
+        run_units(domains, tasks, jobs, force)
 
     except FileNotFoundError as e:
         print(f"{e}")
         print("No raw PDDL directory? Run ../setup.sh to populate raw PDDL data.")
 
-def anonymize_directory(dir: str):
+def anonymize_directory(dir: str, jobs: int = 1, force: bool = False):
     """
     Anonymize everything in specific domain directory
     """
@@ -328,16 +653,89 @@ def anonymize_directory(dir: str):
             print(f"{domain_dir} is not a directory.")
             return 
 
-        for domain_file in domain_dir.glob("domain*.pddl"):
-            anon_domain_path = anonymize_domain(domain_file.name, domain_dir)
-
-            for task_file in domain_dir.glob("task*.pddl"):
-                anonymize_task(task_file.name, domain_dir, domain_file.resolve(), anon_domain_path)
+        domains, tasks = domain_units(domain_dir)
+        run_units(domains, tasks, jobs, force, dir_names={domain_dir.name})
         
     except FileNotFoundError as e:
         print(f"{e}")
         print("No raw PDDL directory? Run ../setup.sh to populate raw PDDL data.")
         
+class Restorer:
+    """
+    Compiled anon -> real substitution for one symbol table
+    Splits the text on the token pattern once and maps every token through a
+    dict lookup, instead of calling back into Python for each match
+    """
+    TOKEN_PATTERN = re.compile(r"([a-zA-Z_?][a-zA-Z0-9_\-]*)")
+    # joins texts for bulk restore, can never be part of a token
+    SEPARATOR = "\0"
+
+    def __init__(self, symbols: dict[str, str]):
+        # flatten chained task tables once, lookups below are the hot path
+        self.symbols = symbols if isinstance(symbols, dict) else dict(symbols)
+
+    def restore(self, anon_text: str) -> str:
+        parts = self.TOKEN_PATTERN.split(anon_text)
+        get = self.symbols.get
+        # odd indices hold the tokens, even ones the text in between
+        parts[1::2] = [get(token, token) for token in parts[1::2]]
+        return "".join(parts)
+
+    def restore_many(self, anon_texts: list[str]) -> list[str]:
+        """
+        Restore several texts in one pass over their concatenation
+        """
+        if any(self.SEPARATOR in text for text in anon_texts):
+            return [self.restore(text) for text in anon_texts]
+        return self.restore(self.SEPARATOR.join(anon_texts)).split(self.SEPARATOR)
+
+# cache of Restorer, keyed by (symbol table path, mtime)
+_restorers = {}
+
+def load_symbols(symbol_path: Path):
+    """
+    Load an anon -> real symbol table
+    Understands both layouts: a flat dict, or a task table
+    {"extends": "<domain>_symbols.json", "symbols": {...}} that only holds the
+    task symbols and is chained onto its (cached) domain table
+    """
+    with open(symbol_path, "r") as f:
+        table = json.load(f)
+
+    if "extends" not in table or "symbols" not in table:
+        return table
+
+    domain_path = symbol_path.parent / table["extends"]
+    key = (str(domain_path), os.stat(domain_path).st_mtime_ns)
+    if key not in _domain_symbols:
+        _domain_symbols[key] = load_symbols(domain_path)
+    return ChainMap(table["symbols"], _domain_symbols[key])
+
+def get_restorer(symbol_path: Path) -> Restorer:
+    """
+    Cached Restorer for a symbols.json file, rebuilt if the file changes
+    """
+    key = (str(symbol_path), os.stat(symbol_path).st_mtime_ns)
+    if key not in _restorers:
+        # symbols stored as anon -> original
+        _restorers[key] = Restorer(load_symbols(symbol_path))
+    return _restorers[key]
+
+def symbol_file_for(anon_path: Path):
+    """
+    Symbol table for an anonymized file, e.g. task01.pddl or task01.plan -> task01_symbols.json
+    """
+    return anon_path.parent / f"{anon_path.name.split('.')[0]}_symbols.json"
+
+def restored_path_for(anon_path: Path):
+    return anon_path.parent / f"{anon_path.stem}_restored{anon_path.suffix or '.pddl'}"
+
+def restore_text(anon_text: str, symbol_path: Path) -> str:
+    """
+    Restore an anonymized PDDL or plan string in memory
+    """
+    return get_restorer(symbol_path).restore(anon_text)
+
 def restore_file(anon_path: Path, symbol_path: Path):
     """
     Restore an anonymized PDDL file from a symbols.json file
@@ -346,56 +744,342 @@ def restore_file(anon_path: Path, symbol_path: Path):
     with open(anon_path, "r") as f:
         anon_text = f.read()
 
-    # symbols stored as anon -> original
-    with open(symbol_path, "r") as f:
-        symbols = json.load(f)
-
-    # restore original symbols
-    def replace_token(match):
-        token = match.group(0)
-        return symbols.get(token, token)
-    token_pattern = r"[a-zA-Z_?][a-zA-Z0-9_\-]*"
-    restored_text = re.sub(token_pattern, replace_token, anon_text)
+    restored_text = restore_text(anon_text, symbol_path)
 
     # save restored file
-    restored_path = anon_path.parent / f"{anon_path.stem}_restored.pddl"
+    restored_path = restored_path_for(anon_path)
     with open(restored_path, "w") as f:
         f.write(restored_text)
 
     return restored_path
 
-def restore_directory(dir_path: Path):
+def _restore_batch(batch):
+    symbol_file, anon_files = batch
+
+    anon_texts = []
+    for anon_file in anon_files:
+        with open(anon_file, "r") as f:
+            anon_texts.append(f.read())
+
+    restored_texts = get_restorer(symbol_file).restore_many(anon_texts)
+
+    for anon_file, restored_text in zip(anon_files, restored_texts):
+        restored_path = restored_path_for(anon_file)
+        with open(restored_path, "w") as f:
+            f.write(restored_text)
+        log(f"Restored: {restored_path}")
+
+    return len(anon_files)
+
+def restore_directory(dir_path: Path, pattern: str = "*.pddl", jobs: int = 1):
     """
     Restore all anon files in dir, assuming they have corresponding symbol table
+    Files sharing a symbol table are restored in one batch
     """
 
-    for pddl_file in dir_path.glob("*.pddl"):
-        symbol_file = dir_path / f"{pddl_file.stem}_symbols.json"
+    batches = {}
+    for anon_file in dir_path.glob(pattern):
+        if anon_file.stem.endswith("_restored"):
+            # output of an earlier restore, e.g. task01_aug0.domain_restored.pddl
+            # would otherwise find task01_aug0_symbols.json and be restored again
+            continue
+        symbol_file = symbol_file_for(anon_file)
         if not symbol_file.exists():
-            log(f"No symbol map found for {pddl_file.name}, skipping.")
+            log(f"No symbol map found for {anon_file.name}, skipping.")
             continue
+        batches.setdefault(symbol_file, []).append(anon_file)
 
-        restored_path = restore_file(pddl_file, symbol_file)
-        log(f"Restored: {restored_path}")
+    if jobs > 1:
+        with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(verbose, backend)) as pool:
+            for _ in pool.imap_unordered(_restore_batch, batches.items()):
+                pass
+    else:
+        for batch in batches.items():
+            _restore_batch(batch)
 
 
+def anonymized_tasks():
+    """
+    Yield (domain file, task file, symbol file) for every anonymized task
+    Tasks dropped by --dedupe drop are left out
+    """
+    dropped = load_dropped()
+    for domain_dir in sorted(ANON_DIR.iterdir()):
+        if not domain_dir.is_dir():
+            continue
+        for task_file in sorted(domain_dir.glob("task*.pddl")):
+            if f"{domain_dir.name}/{task_file.stem}" in dropped:
+                continue
+            domain_file = find_domain_file(task_file)
+            symbol_file = symbol_file_for(task_file)
+            if domain_file is None or not symbol_file.exists():
+                log(f"Incomplete anonymized task {task_file}, skipping.")
+                continue
+            yield domain_file, task_file, symbol_file
+
+def export_records():
+    """
+    Yield (anon domain, anon problem, symbols) records for every anonymized task
+    """
+    for domain_file, task_file, symbol_file in anonymized_tasks():
+        symbols = dict(load_symbols(symbol_file))
+        yield {
+            "id": f"{task_file.parent.name}/{task_file.stem}",
+            "domain": domain_file.read_text(),
+            "problem": task_file.read_text(),
+            "symbols": symbols,
+        }
+
+def export_dataset(export_dir: Path, num_shards: int):
+    """
+    Stream anonymized tasks into num_shards size-balanced JSONL shards
+    index.json maps record id -> [shard file, byte offset, byte length]
+    """
+    export_dir.mkdir(parents=True, exist_ok=True)
+    shard_names = [f"shard-{i:05d}-of-{num_shards:05d}.jsonl" for i in range(num_shards)]
+    shards = [open(export_dir / name, "wb") for name in shard_names]
+    # (bytes written, shard) heap, each record goes to the smallest shard
+    sizes = [(0, i) for i in range(num_shards)]
+
+    index = {}
+    try:
+        for record in export_records():
+            line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+            size, i = heapq.heappop(sizes)
+            shards[i].write(line)
+            index[record["id"]] = [shard_names[i], size, len(line)]
+            heapq.heappush(sizes, (size + len(line), i))
+    finally:
+        for shard in shards:
+            shard.close()
+
+    with open(export_dir / "index.json", "w") as f:
+        json.dump(index, f)
+
+    print(f"Exported {len(index)} records to {num_shards} shards in {export_dir}")
+
+def read_record(export_dir: Path, entry: list) -> dict:
+    """
+    Read one exported record given its index.json entry
+    """
+    shard_name, offset, length = entry
+    with open(export_dir / shard_name, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
+
+
+ANON_INDEXED = re.compile(r"(pred|act)_(\d+)$")
+ANON_VAR = re.compile(r"\?(pred|act)_(\d+)_var(\d+)$")
+ANON_OBJ = re.compile(r"(.+)_obj_(\d+)$")
+
+def random_renaming(symbols, rng: random.Random) -> dict[str, str]:
+    """
+    Random anon -> anon renaming that permutes predicate and action indices,
+    and object indices within each type
+    Parameter variables follow their predicate/action
+    """
+    indices = {"pred": [], "act": []}
+    objects = {}
+    for anon in symbols:
+        if m := ANON_INDEXED.match(anon):
+            indices[m[1]].append(int(m[2]))
+        elif m := ANON_OBJ.match(anon):
+            objects.setdefault(m[1], []).append(int(m[2]))
+
+    perms = {}
+    for kind, idxs in list(indices.items()) + list(objects.items()):
+        shuffled = idxs[:]
+        rng.shuffle(shuffled)
+        perms[kind] = dict(zip(idxs, shuffled))
+
+    renaming = {}
+    for anon in symbols:
+        if m := ANON_INDEXED.match(anon):
+            renaming[anon] = f"{m[1]}_{perms[m[1]][int(m[2])]}"
+        elif m := ANON_VAR.match(anon):
+            renaming[anon] = f"?{m[1]}_{perms[m[1]][int(m[2])]}_var{m[3]}"
+        elif m := ANON_OBJ.match(anon):
+            renaming[anon] = f"{m[1]}_obj_{perms[m[1]][int(m[2])]}"
+    return renaming
+
+def augment_task(unit, k: int, seed: int):
+    """
+    Write k randomly renamed copies of an anonymized task and its domain to
+    augment/, each with its own full symbol table
+    Files: <task>_aug<i>.pddl, <task>_aug<i>.domain.pddl, <task>_aug<i>_symbols.json
+    """
+    domain_file, task_file, symbol_file = unit
+    out_dir = task_file.parent / "augment"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    symbols = dict(load_symbols(symbol_file))
+    domain_text = domain_file.read_text()
+    task_text = task_file.read_text()
+
+    # seeded per task, so output doesn't depend on processing order
+    rng = random.Random(f"{seed}/{task_file.parent.name}/{task_file.name}")
+    for i in range(k):
+        renaming = random_renaming(symbols, rng)
+        renamer = Restorer(renaming)
+        name = f"{task_file.stem}_aug{i}"
+
+        (out_dir / f"{name}.domain.pddl").write_text(renamer.restore(domain_text))
+        (out_dir / f"{name}.pddl").write_text(renamer.restore(task_text))
+        with open(out_dir / f"{name}_symbols.json", "w") as f:
+            json.dump({renaming.get(anon, anon): real for anon, real in symbols.items()}, f, indent=2)
+
+    log(f"Augmented task: {task_file}")
+
+def _augment_unit(args):
+    augment_task(*args)
+
+def augment_all(k: int, seed: int, jobs: int = 1):
+    """
+    Augment every anonymized task with k object/predicate/action permutations
+    """
+    start = time.perf_counter()
+    units = [(unit, k, seed) for unit in anonymized_tasks()]
+
+    if jobs > 1:
+        with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(verbose, backend)) as pool:
+            for _ in pool.imap_unordered(_augment_unit, units, chunksize=max(1, len(units) // (jobs * 4))):
+                pass
+    else:
+        for unit in units:
+            _augment_unit(unit)
+
+    elapsed = time.perf_counter() - start
+    print(f"Augmented {len(units)} tasks x {k} in {elapsed:.2f}s")
+
+def load_dropped() -> set[str]:
+    """
+    Ids of tasks dropped as duplicates by the last --dedupe drop
+    """
+    try:
+        with open(ANON_DIR / "dedupe_index.json", "r") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return set()
+    if index["mode"] != "drop":
+        return set()
+    return {id for id, entry in index["tasks"].items() if entry["duplicate_of"]}
+
+def _hash_task(unit):
+    domain_file, task_file, _ = unit
+    digest, exact = canonical.canonical_hash(domain_file.read_text(), task_file.read_text())
+    return f"{task_file.parent.name}/{task_file.stem}", digest, exact
+
+def dedupe_corpus(mode: str, jobs: int = 1):
+    """
+    Hash every anonymized task in canonical form and write dedupe_index.json
+    Tasks with the same hash as an earlier task (by id) are duplicates of it
+    flag only records them, drop also makes anonymized_tasks() skip them
+    """
+    start = time.perf_counter()
+    # hash the full corpus, not what a previous drop left
+    index_path = ANON_DIR / "dedupe_index.json"
+    index_path.unlink(missing_ok=True)
+    units = list(anonymized_tasks())
+
+    if jobs > 1:
+        with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(verbose, backend)) as pool:
+            results = list(pool.imap(_hash_task, units, chunksize=max(1, len(units) // (jobs * 4))))
+    else:
+        results = [_hash_task(unit) for unit in units]
+
+    first = {}
+    tasks = {}
+    for task_id, digest, exact in sorted(results):
+        original = first.setdefault(digest, task_id)
+        tasks[task_id] = {"hash": digest, "exact": exact, "duplicate_of": original if original != task_id else None}
+        if original != task_id:
+            log(f"{task_id} duplicates {original}")
+
+    tmp_path = index_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"mode": mode, "tasks": tasks}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, index_path)
+
+    elapsed = time.perf_counter() - start
+    duplicates = len(tasks) - len(first)
+    inexact = sum(not entry["exact"] for entry in tasks.values())
+    print(f"Hashed {len(tasks)} tasks in {elapsed:.2f}s, {duplicates} duplicates "
+          f"{'dropped' if mode == 'drop' else 'flagged'}, {inexact} hashed past the search cap")
+
+def parse_pucrs(domain_file: Path, task_file: Path):
+    parser = PDDL_Parser()
+    parser.parse_domain(domain_file)
+    parser.parse_problem(task_file)
+
+def parse_fd(domain_file: Path, task_file: Path):
+    fd_backend.FDProblem(fd_backend.FDDomain(domain_file), task_file)
+
+def benchmark_parsers(domain_dirs: list[Path]):
+    """
+    Compare parse throughput (domain + task per pair) of both backends
+    """
+    pairs = []
+    for domain_dir in domain_dirs:
+        pairs += [(domain_file, task_file) for _, domain_file, task_file in domain_units(domain_dir)[1]]
+
+    for name, parse in [("pucrs", parse_pucrs), ("fd", parse_fd)]:
+        if name == "pucrs" and PDDL_Parser is None:
+            print("pucrs: pddl_parser not installed, skipping")
+            continue
+
+        parsed = 0
+        start = time.perf_counter()
+        for domain_file, task_file in pairs:
+            try:
+                parse(domain_file, task_file)
+                parsed += 1
+            except Exception as e:
+                log(f"{name} failed on {task_file}: {e}")
+        elapsed = time.perf_counter() - start
+        rate = parsed / elapsed if elapsed > 0 else 0.0
+        print(f"{name}: parsed {parsed}/{len(pairs)} tasks in {elapsed:.2f}s ({rate:.1f} tasks/sec)")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
 
     parser.add_argument("--domain", type=str, help="Anonymize specific domain directory")
     parser.add_argument("--restore", type=str, help="Restore all PDDL files in directory")
+    parser.add_argument("--pattern", type=str, default="*.pddl", help="Files to restore with --restore, e.g. '*.plan'")
 #    parser.add_argument("--task", type=str, help="Anonymize specific task file")
     parser.add_argument("--all", action="store_true", help="Anonymize all raw PDDL")
+    parser.add_argument("--export", type=str, nargs="?", const=str(EXPORT_DIR), help="Export anonymized PDDL as sharded JSONL")
+    parser.add_argument("--shards", type=int, default=16, help="Number of shards for --export")
+    parser.add_argument("--augment", type=int, help="Write this many random renamings of every anonymized task")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for --augment")
+    parser.add_argument("--dedupe", choices=["flag", "drop"], help="Find tasks identical up to renaming; drop also hides them from --export and --augment")
+    parser.add_argument("--backend", choices=BACKENDS, default="pucrs", help="PDDL parser to anonymize with")
+    parser.add_argument("--bench-parse", action="store_true", help="Compare parse throughput of the backends on --domain or all raw PDDL")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of worker processes (0 = all cores)")
+    parser.add_argument("--force", action="store_true", help="Re-anonymize even if manifest.json says outputs are up to date")
     parser.add_argument("--verbose", action="store_true", help="Verbose output")
     args = parser.parse_args()
 
     verbose = args.verbose
+    backend = args.backend
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+
+    if backend == "pucrs" and PDDL_Parser is None and (args.all or args.domain) and not args.bench_parse:
+        parser.error("pddl_parser is not installed, install it or use --backend fd")
 
-    if args.all:
-        anonymize_all()
+    if args.bench_parse:
+        domain_dirs = [RAW_DIR / args.domain] if args.domain else sorted(d for d in RAW_DIR.iterdir() if d.is_dir())
+        benchmark_parsers(domain_dirs)
+    elif args.all:
+        anonymize_all(jobs, args.force)
     elif args.domain:
-        anonymize_directory(args.domain)
+        anonymize_directory(args.domain, jobs, args.force)
+    elif args.dedupe:
+        dedupe_corpus(args.dedupe, jobs)
+    elif args.augment:
+        augment_all(args.augment, args.seed, jobs)
+    elif args.export:
+        export_dataset(Path(args.export), args.shards)
     elif args.restore:
-        restore_directory(Path(args.restore))
+        restore_directory(Path(args.restore), args.pattern, jobs)
     else:
         parser.print_help()
@@ -0,0 +1,224 @@
+# Canonical form and hash of anonymized PDDL problems, used to find tasks that
+# are identical up to object renaming and fact ordering
+
+import re
+import hashlib
+
+# cap on individualization leaves, past it the form is no longer guaranteed
+# canonical (isomorphic tasks may hash differently, different ones never collide)
+MAX_LEAVES = 64
+
+CONNECTIVES = {"and", "or", "not", "imply", "forall", "exists", "when"}
+
+def parse_sexp(text: str):
+    """
+    Minimal s-expression reader for the PDDL we emit
+    """
+    tokens = re.findall(r"[()]|[^\s()]+", re.sub(r";.*", "", text))
+    stack = [[]]
+    for token in tokens:
+        if token == "(":
+            stack.append([])
+        elif token == ")":
+            node = stack.pop()
+            stack[-1].append(node)
+        else:
+            stack[-1].append(token)
+    return stack[0][0]
+
+def parse_problem(text: str):
+    """
+    Return (objects: name -> type, init facts, goal expression, other sections)
+    Init facts are (predicate, args) with (= (f a b) 3) as ("=f", (a, b, "3"))
+    """
+    objects, init, goal, other = {}, [], None, []
+    for section in parse_sexp(text)[1:]:
+        head = section[0]
+        if head == ":objects":
+            pending = []
+            items = iter(section[1:])
+            for item in items:
+                if item == "-":
+                    typ = next(items)
+                    for obj in pending:
+                        objects[obj] = typ
+                    pending = []
+                else:
+                    pending.append(item)
+            for obj in pending:
+                objects[obj] = "object"
+        elif head == ":init":
+            for fact in section[1:]:
+                if fact[0] == "=":
+                    init.append(("=" + fact[1][0], tuple(fact[1][1:]) + (fact[2],)))
+                else:
+                    init.append((fact[0], tuple(fact[1:])))
+        elif head == ":goal":
+            goal = section[1]
+        elif head != ":domain":
+            other.append(section)
+    return objects, init, goal, other
+
+def goal_atoms(goal, polarity="goal"):
+    """
+    Atoms in a goal expression, tagged with whether they appear negated
+    """
+    if not isinstance(goal, list) or not goal:
+        return []
+    if goal[0] == "not":
+        return goal_atoms(goal[1], "goal-not" if polarity == "goal" else "goal")
+    if goal[0] in CONNECTIVES:
+        return [atom for part in goal[1:] for atom in goal_atoms(part, polarity)]
+    return [(polarity, goal[0], tuple(goal[1:]))]
+
+def refine(colors: dict, facts: list) -> dict:
+    """
+    Color refinement: split objects by the colors of the facts they occur in,
+    until the partition is stable
+    Colors are renumbered by sorted signature, so they are renaming-invariant
+    """
+    num_colors = len(set(colors.values()))
+    while True:
+        signatures = {obj: [] for obj in colors}
+        for section, pred, args in facts:
+            arg_colors = tuple((0, colors[a]) if a in colors else (1, a) for a in args)
+            for i, arg in enumerate(args):
+                if arg in colors:
+                    signatures[arg].append((section, pred, i, arg_colors))
+
+        keys = {obj: (colors[obj], tuple(sorted(sig))) for obj, sig in signatures.items()}
+        ranks = {key: rank for rank, key in enumerate(sorted(set(keys.values())))}
+        colors = {obj: ranks[key] for obj, key in keys.items()}
+        if len(ranks) == num_colors:
+            return colors
+        num_colors = len(ranks)
+
+def serialize(expr, labels: dict) -> str:
+    if not isinstance(expr, list):
+        return labels.get(expr, expr)
+    parts = [serialize(part, labels) for part in expr]
+    if expr and expr[0] in ("and", "or"):
+        parts = [parts[0]] + sorted(parts[1:])
+    return f"({' '.join(parts)})"
+
+def twin_swaps(objects: dict, colors: dict, facts: list, render) -> list[dict]:
+    """
+    Swaps of interchangeable objects (e.g. several identical, unused ones),
+    which would otherwise cost one search leaf each
+    Candidates share a color and their facts up to themselves, each swap is
+    checked against the rendered problem before it is used
+    """
+    occurrences = {obj: [] for obj in objects}
+    for section, pred, args in facts:
+        for obj in set(args) & occurrences.keys():
+            occurrences[obj].append((section, pred, tuple("#" if a == obj else a for a in args)))
+
+    groups = {}
+    for obj in objects:
+        groups.setdefault((colors[obj], tuple(sorted(occurrences[obj]))), []).append(obj)
+
+    swaps = []
+    original = None
+    for group in groups.values():
+        # chain of swaps, so the rest of the group stays connected once the
+        # search individualizes its first object
+        for a, b in zip(group, group[1:]):
+            original = original or render({})
+            if render({a: b, b: a}) == original:
+                swaps.append({a: b, b: a})
+    return swaps
+
+def canonical_form(objects: dict, init: list, goal, other: list) -> tuple[str, bool]:
+    """
+    Canonical string of a problem and whether the search finished within MAX_LEAVES
+    """
+    facts = [("init", pred, args) for pred, args in init] + goal_atoms(goal)
+    type_ranks = {typ: rank for rank, typ in enumerate(sorted(set(objects.values())))}
+    colors = refine({obj: type_ranks[typ] for obj, typ in objects.items()}, facts)
+
+    def render(labels):
+        return "\n".join(
+            sorted(serialize([pred, *args], labels) for pred, args in init)
+            + [serialize(goal, labels)]
+            + [serialize(section, labels) for section in other])
+
+    best = None
+    best_objects = None
+    # automorphisms only list the objects they move
+    automorphisms = twin_swaps(objects, colors, facts, render)
+    leaves = 0
+    truncated = False
+
+    def orbits(path):
+        """
+        Orbit representative of each object under the automorphisms found so far
+        that fix every individualized object on the current path
+        """
+        parent = {obj: obj for obj in objects}
+        def find(obj):
+            while parent[obj] != obj:
+                parent[obj] = parent[parent[obj]]
+                obj = parent[obj]
+            return obj
+        for perm in automorphisms:
+            if not any(obj in perm for obj in path):
+                for obj, image in perm.items():
+                    parent[find(obj)] = find(image)
+        return find
+
+    def search(colors, path):
+        nonlocal best, best_objects, leaves, truncated
+        cells = {}
+        for obj, color in colors.items():
+            cells.setdefault(color, []).append(obj)
+        ties = [cell for cell in cells.values() if len(cell) > 1]
+
+        if not ties:
+            leaves += 1
+            labels = {obj: f"o{color}" for obj, color in colors.items()}
+            by_color = sorted(objects, key=colors.get)
+            form = " ".join(f"{labels[obj]}:{objects[obj]}" for obj in by_color) + "\n" + render(labels)
+            if form == best:
+                # same form under two labelings, the objects they map to the
+                # same label are interchangeable
+                automorphisms.append({obj: image for obj, image in zip(by_color, best_objects)
+                                      if obj != image})
+            elif best is None or form < best:
+                best, best_objects = form, by_color
+            return
+
+        # individualize each object of the first smallest tied cell in turn,
+        # skipping objects a known automorphism maps to one already tried
+        cell = min(ties, key=lambda c: (len(c), colors[c[0]]))
+        tried = set()
+        known = None
+        for obj in cell:
+            if leaves >= MAX_LEAVES:
+                truncated = True
+                return
+            # orbits only change when a leaf below found a new automorphism
+            if known != len(automorphisms):
+                known = len(automorphisms)
+                find = orbits(path)
+                tried_orbits = {find(t) for t in tried}
+            if find(obj) in tried_orbits:
+                continue
+            tried.add(obj)
+            tried_orbits.add(find(obj))
+            split = {o: 2 * c for o, c in colors.items()}
+            split[obj] -= 1
+            search(refine(split, facts), path + [obj])
+
+    search(colors, [])
+    return best, not truncated
+
+def canonical_hash(domain_text: str, problem_text: str) -> tuple[str, bool]:
+    """
+    sha256 over the anonymized domain and the canonical form of the problem
+    Returns (hash, exact)
+    """
+    form, exact = canonical_form(*parse_problem(problem_text))
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha256(domain_text.encode()).digest())
+    digest.update(form.encode())
+    return digest.hexdigest(), exact
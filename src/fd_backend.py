@@ -0,0 +1,277 @@
+# Anonymizer backend built on the vendored Fast Downward PDDL parser
+
+import sys
+import importlib.util
+from pathlib import Path
+
+PROJ_DIR = Path(__file__).resolve().parent.parent
+TRANSLATE_DIR = PROJ_DIR / "downward-linux" / "src" / "translate"
+
+_fd = None
+
+def load_translator():
+    """
+    Import Fast Downward's pddl and pddl_parser packages
+    pddl_parser is loaded as fd_pddl_parser, so it can't clash with the pucrs
+    pddl_parser package anonymize.py uses by default
+    """
+    global _fd
+    if _fd is None:
+        if str(TRANSLATE_DIR) not in sys.path:
+            sys.path.insert(0, str(TRANSLATE_DIR))
+        import pddl
+
+        package_dir = TRANSLATE_DIR / "pddl_parser"
+        spec = importlib.util.spec_from_file_location(
+            "fd_pddl_parser", package_dir / "__init__.py",
+            submodule_search_locations=[str(package_dir)])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["fd_pddl_parser"] = module
+        spec.loader.exec_module(module)
+        importlib.import_module("fd_pddl_parser.parsing_functions")
+
+        _fd = (pddl, module)
+    return _fd
+
+class FDDomain:
+    """
+    Parsed domain plus the real -> anon maps shared by all of its tasks
+    """
+    FIELDS = ["name", "requirements", "types", "type_dict", "constants",
+              "predicates", "predicate_dict", "functions", "actions", "axioms"]
+
+    def __init__(self, path: Path):
+        pddl, parser = load_translator()
+        domain_pddl = parser.pddl_file.parse_pddl_file("domain", path)
+        context = parser.parsing_functions.Context()
+        # parse_domain_pddl is a generator yielding the domain pieces in order
+        pieces = parser.parsing_functions.parse_domain_pddl(context, domain_pddl)
+        for field, value in zip(self.FIELDS, pieces):
+            setattr(self, field, value)
+
+        self.namer = None
+        self.symbols = {}
+
+class FDProblem:
+    FIELDS = ["name", "domain_name", "requirements", "objects", "init", "goal", "use_metric"]
+
+    def __init__(self, domain: FDDomain, path: Path):
+        pddl, parser = load_translator()
+        task_pddl = parser.pddl_file.parse_pddl_file("task", path)
+        context = parser.parsing_functions.Context()
+        pieces = parser.parsing_functions.parse_task_pddl(
+            context, task_pddl, domain.type_dict, domain.predicate_dict)
+        for field, value in zip(self.FIELDS, pieces):
+            setattr(self, field, value)
+
+class Namer:
+    """
+    Maps real names to anonymous ones
+    Types, predicate/function heads and objects each have their own map, since
+    PDDL lets e.g. an object share its name with a type
+    Variables are numbered per scope (action, axiom, goal) in order of appearance
+    """
+    def __init__(self, types: dict, heads: dict, terms: dict, symbols: dict, scope: str = None):
+        self.types = types
+        self.heads = heads
+        self.terms = terms
+        self.symbols = symbols
+        self.scope = scope
+        self.variables = {}
+
+    def scoped(self, scope: str):
+        return Namer(self.types, self.heads, self.terms, self.symbols, scope)
+
+    def type(self, type_name) -> str:
+        if isinstance(type_name, list):
+            # (either t1 t2 ...)
+            return f"({' '.join([type_name[0]] + [self.types.get(t, t) for t in type_name[1:]])})"
+        return self.types.get(type_name, type_name)
+
+    def head(self, name: str) -> str:
+        return self.heads.get(name, name)
+
+    def term(self, name: str) -> str:
+        if not name.startswith("?"):
+            return self.terms.get(name, name)
+        if name not in self.variables:
+            anon = f"?{self.scope}_var{len(self.variables)}"
+            self.variables[name] = anon
+            self.symbols[anon] = name
+        return self.variables[name]
+
+def format_typed(objs, name: Namer) -> str:
+    return " ".join(f"{name.term(obj.name)} - {name.type(obj.type_name)}" for obj in objs)
+
+def format_atom(head: str, args, name: Namer) -> str:
+    return f"({' '.join([name.head(head)] + [name.term(arg) for arg in args])})"
+
+def format_literal(lit, name: Namer) -> str:
+    atom = format_atom(lit.predicate, lit.args, name)
+    return f"(not {atom})" if lit.negated else atom
+
+def format_condition(cond, name: Namer) -> str:
+    pddl, _ = load_translator()
+    if isinstance(cond, pddl.Literal):
+        return format_literal(cond, name)
+    if isinstance(cond, pddl.Truth):
+        return "(and)"
+    if isinstance(cond, pddl.Falsity):
+        return "(or)"
+    if isinstance(cond, (pddl.UniversalCondition, pddl.ExistentialCondition)):
+        tag = "forall" if isinstance(cond, pddl.UniversalCondition) else "exists"
+        return f"({tag} ({format_typed(cond.parameters, name)}) {format_condition(cond.parts[0], name)})"
+    tag = "and" if isinstance(cond, pddl.Conjunction) else "or"
+    return f"({tag} {' '.join(format_condition(part, name) for part in cond.parts)})"
+
+def format_expression(exp, name: Namer) -> str:
+    pddl, _ = load_translator()
+    if isinstance(exp, pddl.NumericConstant):
+        return str(exp.value)
+    return format_atom(exp.symbol, exp.args, name)
+
+def format_effect(eff, name: Namer) -> str:
+    pddl, _ = load_translator()
+    out = format_literal(eff.literal, name)
+    if not isinstance(eff.condition, pddl.Truth):
+        out = f"(when {format_condition(eff.condition, name)} {out})"
+    if eff.parameters:
+        out = f"(forall ({format_typed(eff.parameters, name)}) {out})"
+    return out
+
+def anonymize_domain(domain: FDDomain) -> str:
+    """
+    Fill domain.namer (real -> anon) and domain.symbols (anon -> real),
+    return the anonymized domain text
+    Uses the same naming scheme as the pucrs backend in anonymize.py
+    """
+    symbols = domain.symbols
+    types, heads, terms = {}, {}, {}
+    name = domain.namer = Namer(types, heads, terms, symbols)
+
+    symbols["planning_domain"] = domain.name
+
+    types["object"] = "object"
+    symbols["object"] = "object"
+    for i, type_name in enumerate(sorted(t.name for t in domain.types)):
+        if type_name != "object":
+            types[type_name] = f"type_{i}"
+            symbols[f"type_{i}"] = type_name
+    # types used as predicates in conditions
+    for typ in domain.types:
+        heads[typ.get_predicate_name()] = types[typ.name]
+
+    predicates = [pred for pred in domain.predicates if pred.name != "="]
+    for i, pred in enumerate(predicates):
+        heads[pred.name] = f"pred_{i}"
+        symbols[f"pred_{i}"] = pred.name
+    for i, func in enumerate(domain.functions):
+        # total-cost is part of the :metric syntax, keep it
+        if func.name != "total-cost":
+            heads[func.name] = f"func_{i}"
+            symbols[f"func_{i}"] = func.name
+    for i, action in enumerate(domain.actions):
+        heads[action.name] = f"act_{i}"
+        symbols[f"act_{i}"] = action.name
+
+    constants_by_type = {}
+    for const in domain.constants:
+        type_anon = name.type(const.type_name)
+        anon = f"{type_anon}_const_{len(constants_by_type.setdefault(type_anon, []))}"
+        constants_by_type[type_anon].append(anon)
+        terms[const.name] = anon
+        symbols[anon] = const.name
+
+    lines = []
+    lines.append("(define (domain planning_domain)")
+    if domain.requirements.requirements:
+        lines.append(f"  (:requirements {' '.join(domain.requirements.requirements)})")
+
+    subtypes = {}
+    for typ in domain.types:
+        if typ.basetype_name is not None:
+            subtypes.setdefault(typ.basetype_name, []).append(name.type(typ.name))
+    if subtypes:
+        lines.append("  (:types")
+        for base, subs in subtypes.items():
+            lines.append(f"    {' '.join(subs)} - {name.type(base)}")
+        lines.append("  )")
+
+    if constants_by_type:
+        lines.append("  (:constants")
+        for typ, consts in constants_by_type.items():
+            lines.append(f"    {' '.join(consts)} - {typ}")
+        lines.append("  )")
+
+    lines.append("  (:predicates")
+    for pred in predicates:
+        pred_name = name.scoped(heads[pred.name])
+        lines.append(f"    ({heads[pred.name]} {format_typed(pred.arguments, pred_name)})")
+    lines.append("  )")
+
+    if domain.functions:
+        lines.append("  (:functions")
+        for i, func in enumerate(domain.functions):
+            func_name = name.scoped(f"func_{i}")
+            lines.append(f"    ({name.head(func.name)} {format_typed(func.arguments, func_name)}) - number")
+        lines.append("  )")
+
+    for i, axiom in enumerate(domain.axioms):
+        axiom_name = name.scoped(f"ax_{i}")
+        head = format_atom(axiom.name, [par.name for par in axiom.parameters[:axiom.num_external_parameters]], axiom_name)
+        lines.append(f"  (:derived {head} {format_condition(axiom.condition, axiom_name)})")
+
+    for i, action in enumerate(domain.actions):
+        act_name = name.scoped(f"act_{i}")
+        lines.append(f"  (:action {name.head(action.name)}")
+        lines.append(f"    :parameters ({format_typed(action.parameters, act_name)})")
+        lines.append(f"    :precondition {format_condition(action.precondition, act_name)}")
+        effects = [format_effect(eff, act_name) for eff in action.effects]
+        if action.cost is not None:
+            effects.append(f"(increase {format_expression(action.cost.fluent, act_name)} "
+                           f"{format_expression(action.cost.expression, act_name)})")
+        lines.append(f"    :effect (and {' '.join(effects)})")
+        lines.append("  )")
+
+    lines.append(")")
+    return "\n".join(lines)
+
+def anonymize_problem(domain: FDDomain, problem: FDProblem) -> tuple[str, dict[str, str]]:
+    """
+    Anonymize a problem against an already anonymized domain
+    Returns the problem text and the task-only symbols
+    """
+    pddl, _ = load_translator()
+    symbols = {"planning_problem": problem.name}
+    name = Namer(domain.namer.types, domain.namer.heads, dict(domain.namer.terms), symbols, "goal")
+
+    objects_by_type = {}
+    for obj in problem.objects:
+        type_anon = name.type(obj.type_name)
+        anon = f"{type_anon}_obj_{len(objects_by_type.setdefault(type_anon, []))}"
+        objects_by_type[type_anon].append(anon)
+        name.terms[obj.name] = anon
+        symbols[anon] = obj.name
+
+    lines = []
+    lines.append("(define (problem planning_problem)")
+    lines.append("  (:domain planning_domain)")
+
+    lines.append("  (:objects")
+    for typ, objs in objects_by_type.items():
+        lines.append(f"    {' '.join(objs)} - {typ}")
+    lines.append("  )")
+
+    lines.append("  (:init")
+    for fact in problem.init:
+        if isinstance(fact, pddl.Assign):
+            lines.append(f"    (= {format_expression(fact.fluent, name)} {format_expression(fact.expression, name)})")
+        else:
+            lines.append(f"    {format_literal(fact, name)}")
+    lines.append("  )")
+
+    lines.append(f"  (:goal {format_condition(problem.goal, name)})")
+    if problem.use_metric:
+        lines.append("  (:metric minimize (total-cost))")
+    lines.append(")")
+    return "\n".join(lines), symbols
@@ -0,0 +1,310 @@
+# Generate plans for the anonymized corpus with Fast Downward
+
+import io
+import sys
+import json
+import time
+import shlex
+import argparse
+import os
+import subprocess
+import tempfile
+import signal
+import traceback
+import contextlib
+import multiprocessing
+import anonymize
+from pathlib import Path
+
+FD_DIR = anonymize.PROJ_DIR / "downward-linux"
+FAST_DOWNWARD = FD_DIR / "fast-downward.py"
+TRANSLATE_DIR = FD_DIR / "src" / "translate"
+
+sys.path.insert(0, str(FD_DIR))
+from driver import limits, returncodes
+
+PERCENTILES = [50, 90, 95, 99, 100]
+
+verbose = False
+
+# translate module, imported once per worker with --warm-translator
+_translate = None
+
+def log(args):
+    if verbose:
+        print(args)
+
+def init_worker(verbose_value: bool, memory_limit: int = None):
+    global verbose
+    verbose = verbose_value
+    # warm workers translate in process, so they carry the memory limit themselves
+    limits.set_memory_limit(memory_limit)
+
+def load_translate():
+    """
+    Import Fast Downward's translator into this process
+    Its pddl_parser package would clash with the pucrs one anonymize.py may
+    have imported, so that one is moved aside while the translator imports
+    """
+    global _translate
+    if _translate is None:
+        def take_pddl_parser():
+            return {name: sys.modules.pop(name) for name in list(sys.modules)
+                    if name == "pddl_parser" or name.startswith("pddl_parser.")}
+
+        shadowed = take_pddl_parser()
+        # stays on the path, the translator imports some modules lazily
+        if str(TRANSLATE_DIR) not in sys.path:
+            sys.path.insert(0, str(TRANSLATE_DIR))
+        try:
+            import translate
+        finally:
+            # translate holds on to its own pddl_parser
+            take_pddl_parser()
+            sys.modules.update(shadowed)
+        _translate = translate
+    return _translate
+
+class TranslateTimeout(Exception):
+    pass
+
+def _raise_timeout(signum, frame):
+    raise TranslateTimeout()
+
+def translate_in_process(domain_file: Path, task_file: Path, sas_file: Path, time_limit: int, domain_cache: str = None) -> tuple[int, str]:
+    """
+    Translate with the warm translator, limited to time_limit CPU seconds
+    Returns a translator exit code as in driver/returncodes.py and error output
+    """
+    translate = load_translate()
+    signal.signal(signal.SIGPROF, _raise_timeout)
+    signal.setitimer(signal.ITIMER_PROF, time_limit or 0)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            sas_task = translate.translate_files(str(domain_file), str(task_file), domain_cache=domain_cache)
+        with open(sas_file, "w") as f:
+            sas_task.output(f)
+        return returncodes.SUCCESS, ""
+    except TranslateTimeout:
+        return returncodes.TRANSLATE_OUT_OF_TIME, ""
+    except MemoryError:
+        return returncodes.TRANSLATE_OUT_OF_MEMORY, ""
+    except (translate.pddl_parser.ParseError, translate.TranslateInputError) as err:
+        return returncodes.TRANSLATE_INPUT_ERROR, str(err)
+    except SystemExit as err:
+        # translate_files turns the translator's exits into exceptions, but
+        # an exit must never end the pool worker, or the pool hangs
+        if isinstance(err.code, int):
+            return returncodes.TRANSLATE_CRITICAL_ERROR, traceback.format_exc()
+        return returncodes.TRANSLATE_INPUT_ERROR, str(err.code)
+    except Exception:
+        return returncodes.TRANSLATE_CRITICAL_ERROR, traceback.format_exc()
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+
+def checkpoint_path() -> Path:
+    return anonymize.ANON_DIR / "plans.jsonl"
+
+def load_checkpoint() -> dict:
+    """
+    Latest record per task id from plans.jsonl
+    A line cut short by an interrupted run is ignored
+    """
+    records = {}
+    try:
+        with open(checkpoint_path(), "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record["id"]] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+def status_for(returncode) -> str:
+    if returncode in (returncodes.SUCCESS,
+                      returncodes.SEARCH_PLAN_FOUND_AND_OUT_OF_MEMORY,
+                      returncodes.SEARCH_PLAN_FOUND_AND_OUT_OF_TIME,
+                      returncodes.SEARCH_PLAN_FOUND_AND_OUT_OF_MEMORY_AND_TIME):
+        return "solved"
+    if returncode in (returncodes.TRANSLATE_UNSOLVABLE, returncodes.SEARCH_UNSOLVABLE):
+        return "unsolvable"
+    if returncode == returncodes.SEARCH_UNSOLVED_INCOMPLETE:
+        return "unsolved"
+    if returncode in (returncodes.TRANSLATE_OUT_OF_MEMORY, returncodes.SEARCH_OUT_OF_MEMORY):
+        return "out_of_memory"
+    if returncode in (returncodes.TRANSLATE_OUT_OF_TIME, returncodes.SEARCH_OUT_OF_TIME,
+                      returncodes.SEARCH_OUT_OF_MEMORY_AND_TIME, None):
+        # None: killed by the wall clock backstop
+        return "out_of_time"
+    return "error"
+
+def planner_command(inputs: list[Path], plan_file: Path, config: list[str], sas_file: Path = None) -> list[str]:
+    return ([sys.executable, str(FAST_DOWNWARD), "--plan-file", str(plan_file)]
+            + (["--sas-file", str(sas_file)] if sas_file else [])
+            + config[:config.index("--")]
+            + [str(path) for path in inputs]
+            + config[config.index("--") + 1:])
+
+def plan_task(args):
+    """
+    Run the planner on one task under the time and memory limits
+    Plans are written next to the task, taskNN.pddl -> taskNN.plan, so
+    --restore --pattern '*.plan' finds their symbol tables
+    With warm, the task is translated in this process and the driver only runs search
+    """
+    (domain_file, task_file, _), config, time_limit, memory_limit, warm, domain_cache = args
+    plan_file = task_file.with_suffix(".plan")
+
+    # limits are inherited by the translator and search processes the driver starts
+    def set_limits():
+        limits.set_time_limit(time_limit)
+        limits.set_memory_limit(memory_limit)
+
+    # drop plans of an earlier run, so only this run's plans are reported
+    for old_plan in task_file.parent.glob(f"{plan_file.name}*"):
+        old_plan.unlink()
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sas_file = Path(tmp_dir) / "output.sas"
+        if warm:
+            returncode, stderr = translate_in_process(domain_file, task_file, sas_file, time_limit, domain_cache)
+            cmd = planner_command([sas_file], plan_file, config)
+        else:
+            returncode, stderr = returncodes.SUCCESS, ""
+            cmd = planner_command([domain_file, task_file], plan_file, config, sas_file)
+            if domain_cache:
+                cmd += ["--translate-options", "--domain-cache", domain_cache]
+
+        if returncode == returncodes.SUCCESS:
+            log(" ".join(shlex.quote(part) for part in cmd))
+            try:
+                proc = subprocess.run(
+                    cmd, cwd=tmp_dir, preexec_fn=set_limits,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                    # CPU limits don't catch a planner that blocks, so also bound wall time
+                    timeout=2 * time_limit + 10 if time_limit else None)
+                returncode, stderr = proc.returncode, proc.stderr
+            except subprocess.TimeoutExpired:
+                returncode, stderr = None, ""
+    wall = time.perf_counter() - start
+
+    status = status_for(returncode)
+    plans = sorted(p.name for p in task_file.parent.glob(f"{plan_file.name}*"))
+    if status == "solved" and not plans:
+        status = "error"
+    record = {
+        "id": f"{task_file.parent.name}/{task_file.stem}",
+        "status": status,
+        "returncode": returncode,
+        "wall": round(wall, 3),
+        "plans": plans,
+    }
+    if status == "error":
+        record["stderr"] = stderr[-2000:]
+    return record
+
+def percentile(values: list[float], p: int) -> float:
+    # nearest rank
+    values = sorted(values)
+    return values[max(0, -(-p * len(values) // 100) - 1)]
+
+def print_percentiles(records: list[dict]):
+    rows = [("all", [r["wall"] for r in records]),
+            ("solved", [r["wall"] for r in records if r["status"] == "solved"])]
+    header = f"{'':10}{'n':>7}" + "".join(f"{'p' + str(p) if p < 100 else 'max':>10}" for p in PERCENTILES)
+    print(header)
+    for name, walls in rows:
+        cells = "".join(f"{percentile(walls, p):>9.2f}s" if walls else f"{'-':>10}" for p in PERCENTILES)
+        print(f"{name:10}{len(walls):>7}{cells}")
+
+def plan_all(config: list[str], time_limit: int, memory_limit: int, domain: str = None,
+             jobs: int = 1, force: bool = False, warm: bool = False, domain_cache: Path = None):
+    """
+    Plan every anonymized task, appending one record per task to plans.jsonl
+    Tasks with a record for the same config and unchanged inputs are skipped,
+    so an interrupted run picks up where it stopped
+    With warm, every worker imports the translator once and translates its
+    tasks in process, instead of the driver starting a translator per task
+    domain_cache is passed to the translator as --domain-cache, so tasks of
+    one domain share invariant synthesis
+    """
+    start = time.perf_counter()
+    config_key = " ".join(config)
+    done = load_checkpoint()
+
+    def inputs(unit):
+        domain_file, task_file, _ = unit
+        return [anonymize.file_hash(domain_file), anonymize.file_hash(task_file)]
+
+    units = [unit for unit in anonymize.anonymized_tasks()
+             if domain is None or unit[1].parent.name == domain]
+    todo = []
+    for unit in units:
+        record = done.get(f"{unit[1].parent.name}/{unit[1].stem}")
+        if (force or record is None or record["config"] != config_key
+                or record["inputs"] != inputs(unit)):
+            todo.append(unit)
+
+    if domain_cache is not None:
+        domain_cache = str(domain_cache.resolve())
+    args = [(unit, config, time_limit, memory_limit, warm, domain_cache) for unit in todo]
+    results = []
+    with open(checkpoint_path(), "a") as checkpoint:
+        def finish(unit, record):
+            record["config"] = config_key
+            record["inputs"] = inputs(unit)
+            checkpoint.write(json.dumps(record) + "\n")
+            checkpoint.flush()
+            results.append(record)
+            log(f"{record['id']}: {record['status']} in {record['wall']:.2f}s")
+
+        # warm workers set a memory limit on themselves, keep that out of this process
+        if jobs > 1 or warm:
+            by_id = {f"{unit[1].parent.name}/{unit[1].stem}": unit for unit in todo}
+            initargs = (verbose, memory_limit if warm else None)
+            with multiprocessing.Pool(jobs, initializer=init_worker, initargs=initargs) as pool:
+                for record in pool.imap_unordered(plan_task, args):
+                    finish(by_id[record["id"]], record)
+        else:
+            for arg in args:
+                finish(arg[0], plan_task(arg))
+
+    elapsed = time.perf_counter() - start
+    solved = sum(r["status"] == "solved" for r in results)
+    rate = solved / elapsed if elapsed > 0 else 0.0
+    print(f"Solved {solved}/{len(results)} tasks in {elapsed:.2f}s ({rate:.2f} solved/sec), "
+          f"{len(units) - len(todo)} already done")
+    if results:
+        print_percentiles(results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate plans for anonymized PDDL with Fast Downward")
+    parser.add_argument("--domain", type=str, help="Only plan tasks of this anonymized domain directory")
+    parser.add_argument("--alias", type=str, default="lama-first", help="Fast Downward alias to plan with")
+    parser.add_argument("--search-options", type=str, help="Search options instead of --alias, e.g. --search-options=\"--search 'astar(lmcut())'\"")
+    parser.add_argument("--build", type=str, help="Fast Downward build to use (default: release)")
+    parser.add_argument("--time-limit", type=int, default=300, help="CPU seconds per translator/search process")
+    parser.add_argument("--memory-limit", type=int, default=4096, help="Memory limit in MB per process")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of planner processes (0 = all cores)")
+    parser.add_argument("--warm-translator", action="store_true", help="Translate in the worker processes instead of starting a translator per task")
+    parser.add_argument("--domain-cache", type=str, help="Directory the translator caches domain-level results in")
+    parser.add_argument("--force", action="store_true", help="Re-plan tasks that already have a record in plans.jsonl")
+    parser.add_argument("--verbose", action="store_true", help="Verbose output")
+    args = parser.parse_args()
+
+    verbose = args.verbose
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+
+    # driver options, then "--", then search options
+    config = ["--build", args.build] if args.build else []
+    if args.search_options:
+        config += ["--"] + shlex.split(args.search_options)
+    else:
+        config += ["--alias", args.alias, "--"]
+
+    plan_all(config, args.time_limit, args.memory_limit * 1024 * 1024, args.domain, jobs, args.force, args.warm_translator,
+             Path(args.domain_cache) if args.domain_cache else None)
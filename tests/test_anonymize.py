@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import anonymize
+
+GRIPPER = Path(__file__).resolve().parent.parent / "downward-linux" / "misc" / "tests" / "benchmarks" / "gripper"
+
+DOMAIN = """(define (domain dom_0)
+  (:predicates (pred_0 ?pred_0_var0 - type_0))
+  (:action act_0 :parameters (?act_0_var0 - type_0)
+    :precondition (pred_0 ?act_0_var0)
+    :effect (not (pred_0 ?act_0_var0))))
+"""
+
+TASK = """(define (problem task_0) (:domain dom_0)
+  (:objects type_0_obj_0 type_0_obj_1 - type_0)
+  (:init (pred_0 type_0_obj_0) (pred_0 type_0_obj_1))
+  (:goal (not (pred_0 type_0_obj_0))))
+"""
+
+SYMBOLS = {
+    "dom_0": "blocks", "task_0": "blocks-1", "type_0": "block",
+    "pred_0": "clear", "?pred_0_var0": "?x",
+    "act_0": "take", "?act_0_var0": "?b",
+    "type_0_obj_0": "a", "type_0_obj_1": "b",
+}
+
+
+def test_restore_augmented_task_twice(tmp_path):
+    domain_file = tmp_path / "domain.pddl"
+    task_file = tmp_path / "task01.pddl"
+    symbol_file = tmp_path / "task01_symbols.json"
+    domain_file.write_text(DOMAIN)
+    task_file.write_text(TASK)
+    symbol_file.write_text(json.dumps(SYMBOLS))
+    anonymize.augment_task((domain_file, task_file, symbol_file), 2, 0)
+
+    augment_dir = tmp_path / "augment"
+    anonymize.restore_directory(augment_dir)
+    files = {path.name: path.read_text() for path in augment_dir.iterdir()}
+    assert "task01_aug0.domain_restored.pddl" in files
+    assert "task01_aug1_restored.pddl" in files
+    assert "(clear a)" in files["task01_aug0_restored.pddl"]
+
+    # restoring again rewrites the same outputs, never restores them
+    anonymize.restore_directory(augment_dir)
+    assert {path.name: path.read_text() for path in augment_dir.iterdir()} == files
+
+
+def setup_corpus(tmp_path, monkeypatch, tasks):
+    monkeypatch.setattr(anonymize, "RAW_DIR", tmp_path / "raw")
+    monkeypatch.setattr(anonymize, "ANON_DIR", tmp_path / "anon")
+    monkeypatch.setattr(anonymize, "backend", "fd")
+    raw_dir = tmp_path / "raw" / "gripper"
+    raw_dir.mkdir(parents=True)
+    (raw_dir / "domain.pddl").write_text((GRIPPER / "domain.pddl").read_text())
+    for name in tasks:
+        (raw_dir / name).write_text((GRIPPER / "prob01.pddl").read_text())
+    return raw_dir
+
+
+def manifest_units(tmp_path):
+    with open(tmp_path / "anon" / "manifest.json") as f:
+        return set(json.load(f)["units"])
+
+
+def test_manifest_drops_deleted_sources(tmp_path, monkeypatch):
+    raw_dir = setup_corpus(tmp_path, monkeypatch, ["task01.pddl", "task02.pddl"])
+    anonymize.anonymize_all()
+    assert manifest_units(tmp_path) == {
+        "gripper/domain.pddl", "gripper/task01.pddl", "gripper/task02.pddl"}
+
+    (raw_dir / "task02.pddl").unlink()
+    anonymize.anonymize_all()
+    assert manifest_units(tmp_path) == {"gripper/domain.pddl", "gripper/task01.pddl"}
+    assert sorted(path.name for path in (tmp_path / "anon" / "gripper").iterdir()) == [
+        "domain.pddl", "domain_symbols.json", "task01.pddl", "task01_symbols.json"]
+
+
+def test_manifest_keeps_progress_of_failed_run(tmp_path, monkeypatch):
+    raw_dir = setup_corpus(tmp_path, monkeypatch, ["task01.pddl"])
+    (raw_dir / "task02.pddl").write_text("(define (problem broken)")
+    monkeypatch.setattr(anonymize, "MANIFEST_SAVE_EVERY", 1)
+    with pytest.raises(Exception, match="Could not parse"):
+        anonymize.anonymize_all()
+    # units that finished before the failure are not redone
+    assert manifest_units(tmp_path) == {"gripper/domain.pddl", "gripper/task01.pddl"}
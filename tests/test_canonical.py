@@ -0,0 +1,74 @@
+import random
+
+import canonical
+
+DOMAIN = "(define (domain dom_0))"
+
+PROBLEM = """(define (problem task_0) (:domain dom_0)
+  (:objects type_0_obj_0 type_0_obj_1 type_0_obj_2 - type_0 type_1_obj_0 type_1_obj_1 - type_1)
+  (:init (pred_0 type_0_obj_0 type_1_obj_0) (pred_0 type_0_obj_1 type_1_obj_0)
+         (pred_1 type_1_obj_0 type_1_obj_1) (pred_2 type_0_obj_2)
+         (= (func_0 type_0_obj_0) 3))
+  (:goal (and (pred_0 type_0_obj_2 type_1_obj_1)
+              (or (pred_2 type_0_obj_0) (not (pred_2 type_0_obj_1))))))
+"""
+
+# PROBLEM with type_0_obj_0 <-> type_0_obj_2 and type_1_obj_0 <-> type_1_obj_1
+# renamed, the :init facts shuffled and the goal parts reordered
+RENAMED = """(define (problem task_0) (:domain dom_0)
+  (:objects type_1_obj_1 type_1_obj_0 - type_1 type_0_obj_2 type_0_obj_1 type_0_obj_0 - type_0)
+  (:init (pred_2 type_0_obj_0) (= (func_0 type_0_obj_2) 3)
+         (pred_1 type_1_obj_1 type_1_obj_0) (pred_0 type_0_obj_1 type_1_obj_1)
+         (pred_0 type_0_obj_2 type_1_obj_1))
+  (:goal (and (or (not (pred_2 type_0_obj_1)) (pred_2 type_0_obj_2))
+              (pred_0 type_0_obj_0 type_1_obj_0))))
+"""
+
+# PROBLEM with the second argument of a pred_0 fact moved from type_1_obj_0
+# to type_1_obj_1
+DIFFERENT = PROBLEM.replace(
+    "(pred_0 type_0_obj_1 type_1_obj_0)", "(pred_0 type_0_obj_1 type_1_obj_1)")
+
+
+def test_renamed_problem_hashes_equal():
+    assert canonical.canonical_hash(DOMAIN, RENAMED) == canonical.canonical_hash(DOMAIN, PROBLEM)
+    assert canonical.canonical_hash(DOMAIN, PROBLEM)[1]
+
+
+def test_different_problem_hashes_differently():
+    assert canonical.canonical_hash(DOMAIN, DIFFERENT)[0] != canonical.canonical_hash(DOMAIN, PROBLEM)[0]
+
+
+def test_unused_objects_stay_exact():
+    # interchangeable objects are pruned as automorphisms, not searched leaf by leaf
+    unused = " ".join(f"type_2_obj_{i}" for i in range(200))
+    problem = PROBLEM.replace(" - type_1)", f" - type_1 {unused} - type_2)")
+    digest, exact = canonical.canonical_hash(DOMAIN, problem)
+    assert exact
+
+    # the unused objects are interchangeable, so their order does not matter
+    shuffled = unused.split()
+    random.Random(0).shuffle(shuffled)
+    problem = PROBLEM.replace(" - type_1)", f" - type_1 {' '.join(shuffled)} - type_2)")
+    assert canonical.canonical_hash(DOMAIN, problem) == (digest, True)
+
+
+def random_cubic_graph(num_nodes: int, rng: random.Random) -> set:
+    while True:
+        stubs = [node for node in range(num_nodes) for _ in range(3)]
+        rng.shuffle(stubs)
+        edges = {(min(a, b), max(a, b)) for a, b in zip(stubs[::2], stubs[1::2]) if a != b}
+        if len(edges) == len(stubs) // 2:
+            return edges
+
+
+def test_leaf_cap_is_not_exact():
+    # color refinement cannot split a regular graph, and a random one has no
+    # automorphisms to prune the search with, so every node is a leaf
+    num_nodes = 2 * canonical.MAX_LEAVES
+    edges = random_cubic_graph(num_nodes, random.Random(0))
+    objects = " ".join(f"type_0_obj_{i}" for i in range(num_nodes))
+    init = " ".join(f"(pred_0 type_0_obj_{a} type_0_obj_{b}) (pred_0 type_0_obj_{b} type_0_obj_{a})"
+                    for a, b in sorted(edges))
+    problem = f"(define (problem task_0) (:domain dom_0) (:objects {objects} - type_0) (:init {init}) (:goal (and)))"
+    assert not canonical.canonical_hash(DOMAIN, problem)[1]
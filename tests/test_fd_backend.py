@@ -0,0 +1,108 @@
+import contextlib
+import io
+from collections import ChainMap
+from pathlib import Path
+
+import pytest
+
+import anonymize
+import fd_backend
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / "downward-linux" / "misc" / "tests" / "benchmarks"
+
+# an object, a type and a predicate named block, constants of two types
+# and an either type
+DOMAIN = """(define (domain clash)
+  (:requirements :strips :typing)
+  (:types block table - object)
+  (:constants t1 t2 - table b0 - block)
+  (:predicates (block ?x - block) (on ?x - block ?y - (either block table)))
+  (:action put
+    :parameters (?x - block ?y - (either block table))
+    :precondition (and (block ?x) (not (on ?x ?y)))
+    :effect (on ?x ?y)))
+"""
+
+TASK = """(define (problem clash-1) (:domain clash)
+  (:objects block b1 - block table - table)
+  (:init (block block) (block b1))
+  (:goal (and (on block table) (on b1 t2))))
+"""
+
+
+def anonymize_task(domain_file: Path, task_file: Path, out_dir: Path):
+    domain = fd_backend.FDDomain(domain_file)
+    anon_domain_file = out_dir / "domain.pddl"
+    anon_task_file = out_dir / "task.pddl"
+    anon_domain_file.write_text(fd_backend.anonymize_domain(domain))
+    anon_task, task_symbols = fd_backend.anonymize_problem(domain, fd_backend.FDProblem(domain, task_file))
+    anon_task_file.write_text(anon_task)
+    return domain, anon_domain_file, anon_task_file, ChainMap(task_symbols, domain.symbols)
+
+
+def problem_summary(domain_file: Path, task_file: Path):
+    domain = fd_backend.FDDomain(domain_file)
+    problem = fd_backend.FDProblem(domain, task_file)
+    goal = io.StringIO()
+    with contextlib.redirect_stdout(goal):
+        problem.goal.dump()
+    return (sorted((obj.name, str(obj.type_name)) for obj in problem.objects),
+            sorted(map(str, problem.init)), goal.getvalue())
+
+
+def test_clashing_names(tmp_path):
+    (tmp_path / "domain.pddl").write_text(DOMAIN)
+    (tmp_path / "task.pddl").write_text(TASK)
+    anon_dir = tmp_path / "anon"
+    anon_dir.mkdir()
+    domain, anon_domain_file, anon_task_file, symbols = anonymize_task(
+        tmp_path / "domain.pddl", tmp_path / "task.pddl", anon_dir)
+    anon_domain = anon_domain_file.read_text()
+    anon_task = anon_task_file.read_text()
+
+    namer = domain.namer
+    assert (namer.types["block"], namer.heads["block"]) == ("type_0", "pred_0")
+    assert "(either type_0 type_2)" in anon_domain
+    # constants are numbered per type
+    assert "type_2_const_0 type_2_const_1 - type_2" in anon_domain
+    assert "type_0_const_0 - type_0" in anon_domain
+    assert (symbols["type_0_obj_0"], symbols["type_2_obj_0"]) == ("block", "table")
+    assert "(pred_0 type_0_obj_0)" in anon_task
+    assert "(pred_1 type_0_obj_1 type_2_const_1)" in anon_task
+
+    restorer = anonymize.Restorer(symbols)
+    assert "(either block table)" in restorer.restore(anon_domain)
+    assert "(on b1 t2)" in restorer.restore(anon_task)
+
+
+@pytest.mark.parametrize("domain_name, task_name, plan", [
+    ("gripper", "prob01.pddl", "(pick ball1 rooma left)\n(move rooma roomb)\n"),
+    ("miconic-simpleadl", "s1-0.pddl", "(up f0 f1)\n(stop f1)\n"),
+    ("philosophers", "p01-phil2.pddl", None),
+    ("satellite", "p25-HC-pfile5.pddl", None),
+])
+def test_benchmark_round_trip(tmp_path, domain_name, task_name, plan):
+    domain_file = BENCHMARKS / domain_name / "domain.pddl"
+    task_file = BENCHMARKS / domain_name / task_name
+    anon_dir = tmp_path / "anon"
+    anon_dir.mkdir()
+    domain, anon_domain_file, anon_task_file, symbols = anonymize_task(domain_file, task_file, anon_dir)
+
+    # the anonymized task parses with the translator, and restores to the original
+    problem_summary(anon_domain_file, anon_task_file)
+    restorer = anonymize.Restorer(symbols)
+    restored_dir = tmp_path / "restored"
+    restored_dir.mkdir()
+    (restored_dir / "domain.pddl").write_text(restorer.restore(anon_domain_file.read_text()))
+    (restored_dir / "task.pddl").write_text(restorer.restore(anon_task_file.read_text()))
+    assert (problem_summary(restored_dir / "domain.pddl", restored_dir / "task.pddl")
+            == problem_summary(domain_file, task_file))
+
+    if plan is not None:
+        # the plan as a planner would write it for the anonymized task
+        terms = {real: anon for anon, real in symbols.items() if "_obj_" in anon or "_const_" in anon}
+        anon_plan = "".join(
+            f"({' '.join([domain.namer.heads[action]] + [terms[arg] for arg in args])})\n"
+            for action, *args in (line[1:-1].split() for line in plan.splitlines()))
+        assert anon_plan != plan
+        assert restorer.restore(anon_plan) == plan
@@ -0,0 +1,33 @@
+import multiprocessing
+
+import plan
+from driver import returncodes
+
+DOMAIN = """
+(define (domain derived)
+  (:requirements :strips :derived-predicates)
+  (:predicates (p) (q))
+  (:derived (q) (p))
+  (:action make-p :parameters () :precondition () :effect (p)))
+"""
+
+# a derived predicate in :init, which the translator rejects with sys.exit
+TASK = """
+(define (problem derived-1) (:domain derived)
+  (:init (q))
+  (:goal (p)))
+"""
+
+def test_warm_translator_survives_translator_exit(tmp_path):
+    domain_file = tmp_path / "domain.pddl"
+    task_file = tmp_path / "task01.pddl"
+    domain_file.write_text(DOMAIN)
+    task_file.write_text(TASK)
+    args = ((domain_file, task_file, None), ["--alias", "lama-first", "--"],
+            60, None, True, None)
+    with multiprocessing.Pool(1, initializer=plan.init_worker, initargs=(False, None)) as pool:
+        # a worker killed by SystemExit would leave this waiting forever
+        record = pool.imap_unordered(plan.plan_task, [args]).next(timeout=60)
+    assert record["status"] == "error"
+    assert record["returncode"] == returncodes.TRANSLATE_INPUT_ERROR
+    assert "derived predicate" in record["stderr"]